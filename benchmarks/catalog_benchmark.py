@@ -0,0 +1,112 @@
+"""
+Benchmark for VersionCatalog against the raw manifest layout it replaced.
+
+Generates Mojang-style manifests (with every field the real manifest has) plus fallback
+server and custom client lists, then compares memory held after loading and the cost
+of the lookups the detail, search and download paths make:
+
+    python benchmarks/catalog_benchmark.py --sizes 1000 10000 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcdownloader import (
+    MANIFEST_URL, MISSING_CLIENTS_URL, MISSING_SERVERS_URL, build_catalog, merge_versions, parse_release_time,
+)
+
+
+def synthetic_documents(size, seed):
+    """Returns the three startup manifests as JSON text, like they arrive over the network."""
+    rng = random.Random(seed)
+    mojang, servers, clients = [], [], []
+    for i in range(size):
+        released = f"{2009 + i * 15 // size}-{1 + i % 12:02d}-{1 + i % 28:02d}T10:{i % 60:02d}:00+00:00"
+        sha1 = "%040x" % rng.getrandbits(160)
+        mojang.append({"id": f"1.{i}", "type": "release" if i % 10 == 0 else "snapshot",
+                       "url": f"https://piston-meta.mojang.com/v1/packages/{sha1}/1.{i}.json",
+                       "time": released, "releaseTime": released, "sha1": sha1, "complianceLevel": 1})
+        if i % 50 == 0:
+            servers.append({"id": f"1.{i}", "server_url": f"https://example.invalid/servers/1.{i}.jar"})
+    for i in range(max(1, size // 100)):
+        clients.append({"id": f"custom-{i}", "client_url": f"https://example.invalid/clients/{i}.jar",
+                        "above": f"1.{rng.randrange(size)}"})
+    mojang.reverse() # Newest first, like the real manifest
+    return {MANIFEST_URL: json.dumps({"versions": mojang}),
+            MISSING_SERVERS_URL: json.dumps({"versions": servers}),
+            MISSING_CLIENTS_URL: json.dumps({"versions": clients})}
+
+def load_raw(texts):
+    """The previous layout: parsed JSON lists plus the id -> server_url map."""
+    docs = {url: json.loads(text) for url, text in texts.items()}
+    custom = docs[MISSING_CLIENTS_URL]["versions"]
+    missing = {e["id"]: e["server_url"] for e in docs[MISSING_SERVERS_URL]["versions"]}
+    versions = merge_versions(docs[MANIFEST_URL]["versions"], custom).versions
+    return versions, missing, custom
+
+def load_catalog(texts):
+    return build_catalog({url: json.loads(text) for url, text in texts.items()})
+
+def retained_bytes(loader, texts):
+    gc.collect()
+    tracemalloc.start()
+    result = loader(texts)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'entries':>8} {'layout':>8} {'memory (MB)':>12} {'id (us)':>9} {'type (us)':>10} {'range (us)':>11}")
+    for size in args.sizes:
+        texts = synthetic_documents(size, args.seed)
+        versions, missing, custom = load_raw(texts)
+        catalog = load_catalog(texts)
+        rng = random.Random(args.seed)
+        probe = [rng.choice(versions)["id"] for _ in range(64)]
+        start, end = "2012-01-01", "2013-01-01"
+        start_ts = parse_release_time(start + "T00:00:00+00:00")
+        end_ts = parse_release_time(end + "T00:00:00+00:00")
+        number = max(1, 20000 // size)
+
+        def raw_id():
+            # What the detail panel did: scan for the custom entry, check the fallback map
+            for vid in probe[:4]:
+                next((c for c in custom if c["id"] == vid), None)
+                missing.get(vid)
+                next(v for v in versions if v["id"] == vid)
+        def catalog_id():
+            for vid in probe[:4]:
+                catalog.get(vid)
+        rows = [
+            ("dicts", retained_bytes(load_raw, texts),
+             per_call_us(raw_id, number) / 4,
+             per_call_us(lambda: [v for v in versions if v.get("type") == "release"], number),
+             per_call_us(lambda: [v for v in versions if start <= v.get("releaseTime", "") < end], number)),
+            ("catalog", retained_bytes(load_catalog, texts),
+             per_call_us(catalog_id, number * 1000) / 4,
+             per_call_us(lambda: catalog.ids_of_type("release"), number * 1000),
+             per_call_us(lambda: catalog.released_between(start_ts, end_ts), number * 100)),
+        ]
+        for layout, memory, id_us, type_us, range_us in rows:
+            print(f"{size:>8} {layout:>8} {memory / 1e6:>12.2f} {id_us:>9.2f} {type_us:>10.2f} {range_us:>11.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+A local stand-in for piston-meta, piston-data and the fallback lists, for benchmarks and tests.
+
+The server speaks the mirror URL layout (/<scheme>/<host>/<path>, see mcdownloader.mirror_url),
+so the tool runs against it unchanged with --base-url and every URL keeps its real shape.
+It generates a Mojang-style manifest with a chosen number of versions, plus version JSONs,
+fallback server/client lists and jar payloads. Latency, bandwidth and Range support can be
+configured, as can a slow tail (a share of requests that get an extra delay), and it
+counts requests and bytes so callers can check what the tool asked for.
+
+Run it on its own to point the GUI or CLI at it:
+
+    python benchmarks/fake_piston.py --versions 5000 --latency-ms 50 --bandwidth 20M
+    python mcdownloader.py --base-url http://127.0.0.1:8000
+"""
+import argparse
+import collections
+import email.utils
+import hashlib
+import http.server
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zipfile
+
+META_HOST = "piston-meta.mojang.com"
+DATA_HOST = "piston-data.mojang.com"
+LISTS_PATH = "magicdippyegg.github.io/Minecraft-Version-Downloader"
+CHUNK_SIZE = 64 * 1024
+
+
+def _parse_size(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([KMG]?)", text.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"not a size: {text!r}")
+    return int(float(match.group(1)) * {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}[match.group(2)])
+
+def _fake_jar(rng, size, kind):
+    """
+    A real jar of about size bytes: a manifest, a few hundred small classes and a stored
+    random blob as filler. The server jar is laid out like the bundler jars of 1.18+.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as jar:
+        main_class = "net.minecraft.bundler.Main" if kind == "server" else "net.minecraft.client.main.Main"
+        jar.writestr("META-INF/MANIFEST.MF", f"Manifest-Version: 1.0\r\nMain-Class: {main_class}\r\n\r\n")
+        for n in range(300):
+            jar.writestr(f"net/minecraft/{kind}/C{n}.class", b"\xca\xfe\xba\xbe" + rng.randbytes(64) * 8)
+        if kind == "server":
+            jar.writestr("META-INF/main-class", "net.minecraft.server.Main")
+            jar.writestr("META-INF/versions.list", f"{'0' * 64}\t1.0\t1.0/server-1.0.jar\n")
+            jar.writestr("META-INF/libraries.list", "".join(
+                f"{'0' * 64}\tcom.example:lib{n}:1.0\tcom/example/lib{n}-1.0.jar\n" for n in range(12)))
+        jar.writestr(zipfile.ZipInfo("filler.bin"), rng.randbytes(max(0, size - buffer.tell())),
+                     compress_type=zipfile.ZIP_STORED)
+    return buffer.getvalue()
+
+class FakePiston:
+    """
+    The generated content. Every version's server jar has the same payload, and so does
+    every client jar, so a large manifest does not cost a hash per jar. The jars are real
+    ZIPs, for jar inspection. Manifest sha1s are hashes of the exact version JSON bytes
+    served, so the tool's checks pass.
+    """
+    def __init__(self, versions=1000, jar_size=8 << 20, seed=1, fallback_ratio=0.02, custom_ratio=0.01):
+        rng = random.Random(seed)
+        self.jars = {}
+        for kind, size in (("server", jar_size), ("client", jar_size + jar_size // 2)):
+            payload = _fake_jar(rng, size, kind)
+            self.jars[hashlib.sha1(payload).hexdigest()] = payload
+            setattr(self, kind + "_sha1", hashlib.sha1(payload).hexdigest())
+        self.version_jsons = {} # id -> bytes
+        entries, servers, clients = [], [], []
+        for i in range(versions):
+            vid = f"1.{i // 10}.{i % 10}" if i % 4 == 0 else f"{10 + i // 52}w{i % 52 + 1:02d}a"
+            vtype = "release" if i % 4 == 0 else "snapshot"
+            released = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(1_250_000_000 + i * 86_400))
+            body = self._version_json(vid, vtype, released)
+            sha1 = hashlib.sha1(body).hexdigest()
+            self.version_jsons[vid] = body
+            entries.append({"id": vid, "type": vtype, "url": f"https://{META_HOST}/v1/packages/{sha1}/{vid}.json",
+                            "time": released, "releaseTime": released, "sha1": sha1, "complianceLevel": 1})
+            if rng.random() < fallback_ratio:
+                servers.append({"id": vid, "server_url": f"https://{DATA_HOST}/v1/objects/{self.server_sha1}/server.jar"})
+        for i in range(max(1, int(versions * custom_ratio))):
+            clients.append({"id": f"custom-{i}", "above": rng.choice(entries)["id"],
+                            "client_url": f"https://{DATA_HOST}/v1/objects/{self.client_sha1}/client.jar"})
+        entries.reverse() # Newest first, like the real manifest
+        latest = {"release": next(e["id"] for e in entries if e["type"] == "release"), "snapshot": entries[0]["id"]}
+        self.documents = {
+            f"{META_HOST}/mc/game/version_manifest_v2.json": json.dumps({"latest": latest, "versions": entries}).encode(),
+            f"{LISTS_PATH}/missing_servers.json": json.dumps({"versions": servers}).encode(),
+            f"{LISTS_PATH}/missing_clients.json": json.dumps({"versions": clients}).encode(),
+        }
+        self.ids = [e["id"] for e in entries]
+
+    def _version_json(self, vid, vtype, released):
+        libraries = [{"name": f"com.example:lib{n}:1.0", "downloads": {"artifact": {
+            "path": f"com/example/lib{n}/1.0/lib{n}-1.0.jar", "sha1": "0" * 40, "size": 1024,
+            "url": f"https://libraries.minecraft.net/com/example/lib{n}/1.0/lib{n}-1.0.jar"}}} for n in range(12)]
+        downloads = {kind: {"sha1": sha1, "size": len(self.jars[sha1]),
+                            "url": f"https://{DATA_HOST}/v1/objects/{sha1}/{kind}.jar"}
+                     for kind, sha1 in (("server", self.server_sha1), ("client", self.client_sha1))}
+        return json.dumps({"id": vid, "type": vtype, "releaseTime": released, "time": released,
+                           "mainClass": "net.minecraft.client.main.Main", "downloads": downloads,
+                           "libraries": libraries}).encode()
+
+    def lookup(self, host_path):
+        """Returns the bytes served at <host>/<path>, or None."""
+        if host_path in self.documents:
+            return self.documents[host_path]
+        match = re.fullmatch(rf"{META_HOST}/v1/packages/[0-9a-f]{{40}}/(.+)\.json", host_path)
+        if match:
+            return self.version_jsons.get(match.group(1))
+        match = re.fullmatch(rf"{DATA_HOST}/v1/objects/([0-9a-f]{{40}})/[^/]+", host_path)
+        if match:
+            return self.jars.get(match.group(1))
+        return None
+
+class FakePistonServer:
+    """
+    Serves a FakePiston over HTTP/1.1 on localhost. latency is added before every response,
+    and slow_ratio of the responses wait slow_latency more on top (chosen with a seeded RNG,
+    so runs repeat). bandwidth caps each connection in bytes per second (0 for no cap),
+    and with ranges=False Range headers are ignored the way some mirrors do.
+    """
+    def __init__(self, content, latency=0.0, bandwidth=0, ranges=True, port=0, slow_ratio=0.0, slow_latency=0.0,
+                 seed=1):
+        self.content = content
+        self.latency = latency
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_latency
+        self._rng = random.Random(seed)
+        self.bandwidth = bandwidth
+        self.ranges = ranges
+        self.started = email.utils.formatdate(usegmt=True)
+        self.requests = collections.Counter() # "<host>/<path>" -> requests
+        self._etags = {} # "<host>/<path>" -> ETag, so jars are hashed once rather than per request
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    def _handler(self):
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                _, _, host_path = self.path.lstrip("/").partition("/") # Drop the scheme
+                with fake._lock:
+                    fake.requests[host_path] += 1
+                    slow = fake.slow_ratio and fake._rng.random() < fake.slow_ratio
+                delay = fake.latency + (fake.slow_latency if slow else 0)
+                if delay:
+                    time.sleep(delay)
+                body = fake.content.lookup(host_path)
+                if body is None:
+                    return self._send(404, b"")
+                etag = fake._etags.get(host_path)
+                if etag is None:
+                    etag = fake._etags[host_path] = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, b"", {"ETag": etag}, body_allowed=False)
+                headers = {"ETag": etag, "Last-Modified": fake.started}
+                rng = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+                if fake.ranges and rng and any(rng.groups()) and \
+                        self.headers.get("If-Range", etag) in (etag, fake.started):
+                    if rng.group(1):
+                        start = int(rng.group(1))
+                        end = min(int(rng.group(2)), len(body) - 1) if rng.group(2) else len(body) - 1
+                    else:
+                        start, end = max(0, len(body) - int(rng.group(2))), len(body) - 1 # The last N bytes
+                    if start >= len(body) or start > end:
+                        return self._send(416, b"", {"Content-Range": f"bytes */{len(body)}"})
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                    return self._send(206, body[start:end + 1], headers)
+                if fake.ranges:
+                    headers["Accept-Ranges"] = "bytes"
+                self._send(200, body, headers)
+
+            def _send(self, status, body, headers=None, body_allowed=True):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if body_allowed:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                view = memoryview(body)
+                started = time.monotonic()
+                for offset in range(0, len(body), CHUNK_SIZE):
+                    try:
+                        self.wfile.write(view[offset:offset + CHUNK_SIZE])
+                    except (BrokenPipeError, ConnectionResetError):
+                        return # The client gave up, e.g. a hedged request that lost the race
+                    if fake.bandwidth:
+                        ahead = (offset + CHUNK_SIZE) / fake.bandwidth - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+                with fake._lock:
+                    fake.bytes_sent += len(body)
+
+        return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--versions", type=int, default=1000, help="versions in the manifest (default: 1000)")
+    parser.add_argument("--jar-size", type=_parse_size, default="8M", help="server jar size, e.g. 8M (default: 8M)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay before every response")
+    parser.add_argument("--bandwidth", type=_parse_size, default="0", help="per-connection cap in bytes/s, e.g. 20M")
+    parser.add_argument("--no-ranges", action="store_true", help="ignore Range headers")
+    parser.add_argument("--slow-ratio", type=float, default=0, help="share of responses that are slow, e.g. 0.05")
+    parser.add_argument("--slow-ms", type=float, default=0, help="extra delay for a slow response")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    content = FakePiston(args.versions, args.jar_size, args.seed)
+    server = FakePistonServer(content, args.latency_ms / 1000, args.bandwidth, not args.no_ranges, args.port,
+                              args.slow_ratio, args.slow_ms / 1000, args.seed)
+    print(f"Serving {args.versions} versions at {server.base_url} (use --base-url {server.base_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
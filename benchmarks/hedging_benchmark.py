@@ -0,0 +1,88 @@
+"""
+Benchmark for hedged requests and source selection across mirrors, using local fake servers.
+
+Two FakePistonServers stand in for equivalent sources: a primary with a slow tail and a
+mirror that is a little slower but steady. Version JSONs are fetched one after
+another through the tool's Fetcher, and the latency percentiles are compared for:
+
+    single    the primary alone: every slow response is waited out
+    hedged    primary and mirror: a request still waiting at the primary's p95 is raced on the mirror
+    failover  the primary stalls past the timeout: the first request fails over, later ones go to the mirror
+
+    python benchmarks/hedging_benchmark.py --requests 400 --slow-ratio 0.02 --slow-ms 400
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mcdownloader as m
+from fake_piston import META_HOST, FakePiston, FakePistonServer
+
+SCENARIOS = ("single", "hedged", "failover")
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run(scenario, content, args):
+    stalled = scenario == "failover"
+    primary = FakePistonServer(content, args.timeout * 2 if stalled else args.latency_ms / 1000,
+                               slow_ratio=args.slow_ratio, slow_latency=args.slow_ms / 1000, seed=args.seed).start()
+    mirror = FakePistonServer(content, args.mirror_latency_ms / 1000, seed=args.seed).start()
+    m.set_base_url(primary.base_url)
+    m.set_mirrors([] if scenario == "single" else [mirror.base_url])
+    m.FETCHER = m.Fetcher() # Fresh latency history for every scenario
+    m.METRICS.reset()
+    urls = [f"https://{META_HOST}/v1/packages/{hashlib.sha1(content.version_jsons[vid]).hexdigest()}/{vid}.json"
+            for vid in content.ids]
+    latencies = []
+    try:
+        for i in range(args.requests):
+            start = time.perf_counter()
+            with m.FETCHER.open(urls[i % len(urls)], timeout=args.timeout) as resp:
+                resp.read()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        m.set_base_url(None)
+        m.set_mirrors(None)
+        primary.stop()
+        mirror.stop()
+    fetch = m.METRICS.snapshot()["caches"].get("fetch", {})
+    return {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99), "max": max(latencies), "mean": statistics.mean(latencies),
+            "primary_requests": sum(primary.requests.values()), "mirror_requests": sum(mirror.requests.values()),
+            "hedged": fetch.get("hedged", 0), "retries": fetch.get("retry", 0)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=5, help="primary's usual delay (default: 5)")
+    parser.add_argument("--mirror-latency-ms", type=float, default=25, help="mirror's delay (default: 25)")
+    parser.add_argument("--slow-ratio", type=float, default=0.02,
+                        help="share of slow primary responses (default: 0.02)")
+    parser.add_argument("--slow-ms", type=float, default=400, help="extra delay of a slow primary response (default: 400)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-request timeout in seconds")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="run only these (repeatable)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    content = FakePiston(200, 1024, args.seed)
+    print(f"{'scenario':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'primary':>8} {'mirror':>7} {'hedged':>7} {'retries':>7}")
+    for scenario in args.scenario or SCENARIOS:
+        r = run(scenario, content, args)
+        print(f"{scenario:>9} {r['p50'] * 1000:>8.1f} {r['p95'] * 1000:>8.1f} {r['p99'] * 1000:>8.1f} "
+              f"{r['max'] * 1000:>8.1f} {r['primary_requests']:>8} {r['mirror_requests']:>7} "
+              f"{r['hedged']:>7} {r['retries']:>7}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
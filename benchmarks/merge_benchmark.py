@@ -0,0 +1,151 @@
+"""
+Benchmark for merge_versions against the original round-based merge.
+
+Builds synthetic manifests (Mojang-style entries plus custom clients with random
+'above' chains, dangling targets and cycles), checks that merge_versions produces
+exactly the same ordering as the original implementation, and reports timings.
+
+    python benchmarks/merge_benchmark.py --sizes 10000 30000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcdownloader import merge_versions
+
+
+def legacy_merge_and_sort_versions(mojang_versions, custom_versions):
+    """
+    Merges Mojang versions and custom client versions, then sorts them
+    respecting the 'above' dependency for custom clients.
+    Custom versions will generally appear *before* their 'above' target if possible,
+    or at the beginning if no 'above' target is found or if the target is not in the list.
+    """
+    # Create a dictionary for quick lookup of all versions (official + custom, by ID)
+    all_versions_map = {v["id"]: v for v in mojang_versions}
+    for v in custom_versions:
+        all_versions_map[v["id"]] = v # Custom versions can overwrite or add new IDs
+
+    final_ordered_versions = []
+    # Keep track of versions already added to the final list to avoid duplicates
+    added_to_final = set()
+
+    # Simple approach for sorting:
+    # First, add all official Mojang versions.
+    for v in mojang_versions:
+        final_ordered_versions.append(v)
+        added_to_final.add(v["id"])
+
+    # Now, iterate through custom versions and try to insert them based on 'above'.
+    # We need a robust way to insert. We can build a graph for a proper topological sort,
+    # but for simple 'above' cases, we can repeatedly try to insert until no more can be placed.
+
+    # Create a list of custom versions that still need to be placed.
+    unplaced_custom_versions = [v for v in custom_versions if v["id"] not in added_to_final]
+
+    # Loop to try placing versions that have an 'above' dependency.
+    # This will run as long as we successfully place versions in an iteration.
+    placed_this_iteration = True
+    while placed_this_iteration and unplaced_custom_versions:
+        placed_this_iteration = False
+        next_unplaced_custom = [] # Collect versions that still can't be placed this round
+
+        for custom_v in unplaced_custom_versions:
+            custom_id = custom_v["id"]
+            above_id = custom_v.get("above")
+
+            if above_id and above_id in added_to_final:
+                # Find the index of the 'above_id' version in the current final list
+                insert_index = -1
+                for i, v_in_final in enumerate(final_ordered_versions):
+                    if v_in_final["id"] == above_id:
+                        insert_index = i
+                        break
+
+                if insert_index != -1:
+                    # Insert the custom version directly before its 'above' target
+                    final_ordered_versions.insert(insert_index, custom_v)
+                    added_to_final.add(custom_id)
+                    placed_this_iteration = True
+                else:
+                    # Should not happen if above_id is in added_to_final, but for safety
+                    next_unplaced_custom.append(custom_v)
+            elif not above_id:
+                # If no 'above' specified, or 'above' target not found in the manifest,
+                # simply append it to the beginning of the list.
+                # This will put them at the very top if no 'above' constraint pulls them down.
+                final_ordered_versions.insert(0, custom_v)
+                added_to_final.add(custom_id)
+                placed_this_iteration = True
+            else: # above_id is specified but not yet in the final list
+                next_unplaced_custom.append(custom_v)
+
+        unplaced_custom_versions = next_unplaced_custom # Update for the next iteration
+
+    # Any remaining custom versions that could not be placed due to missing 'above' targets
+    # or complex unresolvable dependencies will be appended to the very end.
+    for v in unplaced_custom_versions:
+        if v["id"] not in added_to_final: # Double check to avoid accidental duplicates
+            final_ordered_versions.append(v)
+            added_to_final.add(v["id"])
+
+
+    return final_ordered_versions
+
+
+def synthetic_manifest(size, custom_ratio, seed):
+    """Returns (mojang_versions, custom_versions) with size entries in total."""
+    rng = random.Random(seed)
+    custom_count = max(1, int(size * custom_ratio))
+    mojang_versions = [
+        {"id": f"1.{i}", "type": "release" if i % 10 == 0 else "snapshot",
+         "releaseTime": f"2010-01-01T00:00:{i % 60:02d}+00:00"}
+        for i in range(size - custom_count)
+    ]
+    custom_ids = [f"custom-{i}" for i in range(custom_count)]
+    custom_versions = []
+    for custom_id in custom_ids:
+        roll = rng.random()
+        entry = {"id": custom_id, "client_url": f"https://example.invalid/{custom_id}.jar"}
+        if roll < 0.1:
+            pass # No 'above': goes to the top
+        elif roll < 0.5 and mojang_versions:
+            entry["above"] = rng.choice(mojang_versions)["id"]
+        elif roll < 0.95:
+            entry["above"] = rng.choice(custom_ids) # Chains, forward references and cycles
+        else:
+            entry["above"] = f"missing-{custom_id}"
+        custom_versions.append(entry)
+    return mojang_versions, custom_versions
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 30000, 100000])
+    parser.add_argument("--custom-ratio", type=float, default=0.01,
+                        help="fraction of entries that are custom clients (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'entries':>8} {'custom':>7} {'legacy (s)':>11} {'linear (s)':>11} {'speedup':>8}  match")
+    ok = True
+    for size in args.sizes:
+        mojang_versions, custom_versions = synthetic_manifest(size, args.custom_ratio, args.seed)
+        expected, legacy_time = timed(legacy_merge_and_sort_versions, mojang_versions, custom_versions)
+        result, linear_time = timed(merge_versions, mojang_versions, custom_versions)
+        match = [v["id"] for v in result.versions] == [v["id"] for v in expected]
+        ok = ok and match
+        print(f"{size:>8} {len(custom_versions):>7} {legacy_time:>11.4f} {linear_time:>11.4f} "
+              f"{legacy_time / max(linear_time, 1e-9):>7.1f}x  {'yes' if match else 'NO'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+End-to-end benchmark of the tool against a local fake piston server (see fake_piston.py).
+
+Times every stage a user waits on, using the same code paths as the GUI and the batch
+command. The stages are: loading the version list (cold, then revalidated with a warm cache),
+merging, building and querying the search index, loading details for a run of selections
+(cold, then cached), jar download throughput, in a single stream and in segments, and
+inspecting a jar remotely from its ZIP directory (skipped with --no-ranges).
+The results are written as JSON. With --compare, any stage that got slower than a
+previous result file by more than --tolerance makes the run exit with status 1:
+
+    python benchmarks/pipeline_benchmark.py --versions 5000 --latency-ms 20 -o results.json
+    python benchmarks/pipeline_benchmark.py --versions 5000 --latency-ms 20 --compare results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mcdownloader as m
+from fake_piston import FakePiston, FakePistonServer, _parse_size
+
+SCHEMA_VERSION = 1
+SEARCH_QUERIES = ("1.2", "w1", "snapshot 1.", "type:release", "type:snapshot after:2012", "custom", "zzz")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def summarize(samples, **extra):
+    return dict(extra, runs=len(samples), seconds=statistics.median(samples), min_seconds=min(samples))
+
+def bench_load(server, cache_dir):
+    """What the GUI's load_versions and the batch command do: fetch, merge and snapshot the catalog."""
+    loader = m.ManifestLoader(cache_dir)
+    snapshot = m.CatalogSnapshot(os.path.join(cache_dir, "catalog.sqlite"))
+    server.reset_counters()
+    seconds, (catalog, _) = timed(lambda: m.fetch_catalog(loader, snapshot))
+    return seconds, catalog, sum(server.requests.values())
+
+def bench_details(cache_dir, versions):
+    """Selects each version in turn and waits for its details, like arrowing through the list slowly."""
+    loader = m.DetailLoader(m.VersionJsonCache(cache_dir))
+    latencies = []
+    for v in versions:
+        done = threading.Event()
+        start = time.perf_counter()
+        loader.request(v, lambda *result: done.set())
+        done.wait()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def bench_download(url, sha1, directory, segments):
+    path = os.path.join(directory, f"download-{segments}.jar")
+    downloader = m.SegmentedDownloader(segments=segments)
+    seconds, _ = timed(lambda: downloader.download(url, path, expected_sha1=sha1))
+    size = os.path.getsize(path)
+    os.remove(path)
+    return seconds, size
+
+def run(args):
+    content = FakePiston(args.versions, args.jar_size, args.seed)
+    server = FakePistonServer(content, args.latency_ms / 1000, args.bandwidth, not args.no_ranges).start()
+    m.set_base_url(server.base_url)
+    work_dir = tempfile.mkdtemp(prefix="mvd-bench-")
+    results = {}
+    try:
+        cold, warm, requests = [], [], {}
+        for run_index in range(args.runs):
+            cache_dir = os.path.join(work_dir, f"load-{run_index}")
+            seconds, catalog, requests["cold"] = bench_load(server, cache_dir)
+            cold.append(seconds)
+            seconds, _, requests["warm"] = bench_load(server, cache_dir)
+            warm.append(seconds)
+        results["load_cold"] = summarize(cold, versions=len(catalog), requests=requests["cold"])
+        results["load_warm"] = summarize(warm, versions=len(catalog), requests=requests["warm"])
+
+        docs = {url: json.loads(content.documents[url.split("://", 1)[1]]) for url in m.STARTUP_MANIFEST_URLS}
+        mojang = docs[m.MANIFEST_URL]["versions"]
+        custom = docs[m.MISSING_CLIENTS_URL]["versions"]
+        results["merge"] = summarize([timed(lambda: m.merge_versions(mojang, custom))[0] for _ in range(args.runs)],
+                                     versions=len(mojang) + len(custom))
+
+        build = [timed(lambda: m.VersionSearchIndex(catalog.versions, catalog.server_fallback_ids())) for _ in range(args.runs)]
+        results["search_index"] = summarize([seconds for seconds, _ in build])
+        index = build[-1][1]
+        per_query = []
+        for _ in range(args.runs):
+            seconds, _ = timed(lambda: [index.search(query) for query in SEARCH_QUERIES])
+            per_query.append(seconds / len(SEARCH_QUERIES))
+        results["search_query"] = summarize(per_query, queries=len(SEARCH_QUERIES))
+
+        selection = [v for v in catalog.versions if "url" in v][:args.selections]
+        details_dir = os.path.join(work_dir, "details")
+        cold = bench_details(details_dir, selection)
+        warm = bench_details(details_dir, selection)
+        results["details_cold"] = summarize(cold, selections=len(selection))
+        results["details_warm"] = summarize(warm, selections=len(selection))
+
+        url = f"https://piston-data.mojang.com/v1/objects/{content.client_sha1}/client.jar"
+        for segments in sorted({1, args.segments}):
+            samples = [bench_download(url, content.client_sha1, work_dir, segments) for _ in range(args.runs)]
+            size = samples[0][1]
+            seconds = [s for s, _ in samples]
+            results[f"download_{segments}_segments"] = summarize(
+                seconds, bytes=size, mb_per_sec=round(size / statistics.median(seconds) / 1e6, 2))
+
+        if not args.no_ranges: # Remote inspection reads the jar's tail with Range requests
+            def inspect():
+                with m.JarContents.from_url(url) as contents:
+                    return contents.summary()
+            samples = [timed(inspect) for _ in range(args.runs)]
+            results["jar_inspect"] = summarize([seconds for seconds, _ in samples], entries=samples[0][1]["entries"],
+                                               bytes=samples[0][1]["fetched"], jar_bytes=samples[0][1]["size"])
+    finally:
+        m.set_base_url(None)
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report, baseline, tolerance):
+    """Prints each stage against the baseline; returns the names of stages that regressed."""
+    regressed = []
+    for stage, result in report["results"].items():
+        before = baseline.get("results", {}).get(stage)
+        if not before:
+            continue
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressed.append(stage)
+            flag = "  REGRESSION"
+        print(f"{stage:>22} {before['seconds'] * 1000:>10.2f} -> {result['seconds'] * 1000:>10.2f} ms "
+              f"({ratio:.2f}x){flag}", file=sys.stderr)
+    return regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--versions", type=int, default=1000, help="versions in the fake manifest (default: 1000)")
+    parser.add_argument("--jar-size", type=_parse_size, default="8M", help="server jar size (default: 8M)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="server delay before every response")
+    parser.add_argument("--bandwidth", type=_parse_size, default="0", help="per-connection cap in bytes/s")
+    parser.add_argument("--no-ranges", action="store_true", help="server ignores Range headers")
+    parser.add_argument("--segments", type=int, default=m.DOWNLOAD_SEGMENTS)
+    parser.add_argument("--selections", type=int, default=20, help="versions whose details are loaded")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="a previous JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown ratio above which --compare fails (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "tolerance")},
+        "results": run(args),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for stage, result in report["results"].items():
+        extra = f"  {result['mb_per_sec']} MB/s" if "mb_per_sec" in result else ""
+        print(f"{stage:>22} {result['seconds'] * 1000:>10.2f} ms{extra}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("Warning: baseline was run with a different configuration", file=sys.stderr)
+        return 1 if compare(report, baseline, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
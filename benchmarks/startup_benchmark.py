@@ -0,0 +1,117 @@
+"""
+Benchmark for the time from launch until the version list can be shown.
+
+Serves synthetic startup manifests from a local HTTP server (so no real network is
+involved) and times fresh interpreter processes for each way of getting the catalog:
+
+    cold      empty cache: import the GUI module, fetch the three manifests, merge them
+    cached    the previous behaviour on a warm cache: parse the cached JSON and merge again
+    snapshot  warm cache with a catalog snapshot: map the SQLite snapshot and read the rows
+    headless  import only the core module, as the batch/install commands do
+
+    python benchmarks/startup_benchmark.py --sizes 1000 10000 --runs 5
+"""
+import argparse
+import functools
+import http.server
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("cold", "cached", "snapshot", "headless")
+
+def child(scenario, base_url):
+    """Runs one scenario in this (fresh) process and prints 'import_ms catalog_ms entries'."""
+    start = time.perf_counter()
+    if scenario == "headless":
+        import mcdownloader
+        assert "tkinter" not in sys.modules, "the headless path imported tkinter"
+        print(f"{(time.perf_counter() - start) * 1000:.2f} 0 0")
+        return
+    import mcdownloader_gui # Pulls in tkinter and the core module, like a GUI launch
+    m = sys.modules["mcdownloader"]
+    imported = time.perf_counter()
+    urls = tuple(f"{base_url}/{name}" for name in ("manifest.json", "missing_servers.json", "missing_clients.json"))
+    m.MANIFEST_URL, m.MISSING_SERVERS_URL, m.MISSING_CLIENTS_URL = urls
+    m.STARTUP_MANIFEST_URLS = urls
+    loader = m.ManifestLoader()
+    if scenario == "cold":
+        catalog, _ = m.fetch_catalog(loader) # Also leaves the cache and snapshot for the warm runs
+    elif scenario == "cached":
+        catalog = m.build_catalog({url: loader.load_cached(url) for url in urls})
+    else:
+        catalog = m.CatalogSnapshot().load(loader.signature(urls))
+        assert catalog is not None, "no usable snapshot"
+    done = time.perf_counter()
+    print(f"{(imported - start) * 1000:.2f} {(done - imported) * 1000:.2f} {len(catalog)}")
+
+def write_documents(directory, size, seed):
+    from catalog_benchmark import synthetic_documents
+    from mcdownloader import MANIFEST_URL, MISSING_CLIENTS_URL, MISSING_SERVERS_URL
+    names = {MANIFEST_URL: "manifest.json", MISSING_SERVERS_URL: "missing_servers.json",
+             MISSING_CLIENTS_URL: "missing_clients.json"}
+    for url, text in synthetic_documents(size, seed).items():
+        with open(os.path.join(directory, names[url]), "w", encoding="utf-8") as f:
+            f.write(text)
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def run(scenario, base_url, cache_dir):
+    env = dict(os.environ, XDG_CACHE_HOME=cache_dir, LOCALAPPDATA=cache_dir)
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", scenario, base_url],
+                         env=env, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    wall = (time.perf_counter() - started) * 1000
+    import_ms, catalog_ms, entries = out.split()
+    return wall, float(import_ms), float(catalog_ms), int(entries)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", nargs=2, metavar=("SCENARIO", "BASE_URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(*args.child)
+        return 0
+
+    print(f"{'entries':>8} {'scenario':>9} {'process (ms)':>13} {'imports (ms)':>13} {'catalog (ms)':>13}")
+    for size in args.sizes:
+        docs_dir = tempfile.mkdtemp(prefix="mvd-docs-")
+        write_documents(docs_dir, size, args.seed)
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(QuietHandler, directory=docs_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            samples = {scenario: [] for scenario in SCENARIOS}
+            for _ in range(args.runs):
+                cache_dir = tempfile.mkdtemp(prefix="mvd-cache-")
+                try:
+                    # cold first: it fills the cache and snapshot the other scenarios read
+                    for scenario in SCENARIOS:
+                        samples[scenario].append(run(scenario, base_url, cache_dir))
+                finally:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+            for scenario in SCENARIOS:
+                wall, imports, catalog, _ = (statistics.median(column) for column in zip(*samples[scenario]))
+                print(f"{size:>8} {scenario:>9} {wall:>13.1f} {imports:>13.1f} {catalog:>13.1f}")
+        finally:
+            server.shutdown()
+            shutil.rmtree(docs_dir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,477 +1,3049 @@
-import tkinter as tk
-from tkinter import messagebox, ttk, filedialog
-from tkinter.scrolledtext import ScrolledText
 import threading
 import urllib.request
+import urllib.error
 import json
 import os
+import hashlib
+import collections
+import bisect
+import time
+import shutil
+import sys
+import re
+import argparse
+import datetime
+import contextlib
+import http.client
+import platform
+import urllib.parse
+import sqlite3
+import http.server
+import concurrent.futures
+import mmap
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor, Future
 
 MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
 MISSING_SERVERS_URL = "https://magicdippyegg.github.io/Minecraft-Version-Downloader/missing_servers.json"
 MISSING_CLIENTS_URL = "https://magicdippyegg.github.io/Minecraft-Version-Downloader/missing_clients.json"
-
-class App(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Minecraft Version Downloader")
-        self.geometry("900x600")
-        self.style = ttk.Style(self)
-        self.style.configure('Treeview', rowheight=24)
-
-        self.rowconfigure(0, weight=0)
-        self.rowconfigure(1, weight=0)
-        self.rowconfigure(2, weight=1)
-        self.columnconfigure(0, weight=1)
-        self.columnconfigure(1, weight=2)
-
-        # Progress bar for loading versions (spans both columns)
-        self.load_progress = ttk.Progressbar(self, mode='indeterminate')
-        self.load_progress.grid(row=0, column=0, columnspan=2, sticky='ew', padx=10, pady=10)
-
-        # Search bar frame
-        search_frame = ttk.Frame(self)
-        search_frame.grid(row=1, column=0, columnspan=2, sticky='ew', padx=10, pady=(0, 10))
-        search_frame.columnconfigure(0, weight=1)
-        search_frame.columnconfigure(1, weight=0)
-
-        self.search_entry = ttk.Entry(search_frame)
-        self.search_entry.grid(row=0, column=0, sticky='ew', padx=(0, 5))
-        self.search_entry.bind("<Return>", self.perform_search_event)
-
-        self.search_button = ttk.Button(search_frame, text="Search", command=self.search_versions)
-        self.search_button.grid(row=0, column=1, sticky='e')
-
-        # Frame to hold version list and scrollbar
-        list_frame = ttk.Frame(self)
-        list_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=5)
-        list_frame.rowconfigure(0, weight=1)
-        list_frame.columnconfigure(0, weight=1)
-
-        # Version list on left
-        cols = ("Version", "Type", "Release Time")
-        self.vers_list = ttk.Treeview(list_frame, columns=cols, show="headings", selectmode='browse')
-        for col in cols:
-            self.vers_list.heading(col, text=col)
-            self.vers_list.column(col, anchor="w", width=200)
-        self.vers_list.grid(row=0, column=0, sticky="nsew")
-        self.vers_list.bind("<<TreeviewSelect>>", self.on_select)
-
-        # Scrollbar for version list
-        list_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.vers_list.yview)
-        list_scroll.grid(row=0, column=1, sticky="ns")
-        self.vers_list.configure(yscrollcommand=list_scroll.set)
-
-        # Details panel on right
-        detail_frame = ttk.Frame(self, padding=(10,10))
-        detail_frame.grid(row=2, column=1, sticky="nsew")
-        detail_frame.columnconfigure(0, weight=1)
-        detail_frame.rowconfigure(1, weight=1)
-
-        # Details text
-        self.details = ScrolledText(detail_frame, wrap=tk.WORD, height=15)
-        self.details.grid(row=0, column=0, sticky="nsew")
-        self.details.configure(state=tk.DISABLED)
-
-        # Download progress bar under details
-        self.download_progress = ttk.Progressbar(detail_frame, mode='determinate', maximum=100)
-        self.download_progress.grid(row=1, column=0, sticky='ew', pady=(5,10))
-        self.download_progress.grid_remove()
-
-        # Buttons
-        btn_frame = ttk.Frame(detail_frame)
-        btn_frame.grid(row=2, column=0, pady=(0,10), sticky="ew")
-        btn_frame.columnconfigure((0,1,2), weight=1)
-
-        self.download_server_btn = ttk.Button(
-            btn_frame, text="Download Server Jar", command=self.download_server, state=tk.DISABLED)
-        self.download_server_btn.grid(row=0, column=0, sticky="ew", padx=(0,5))
-
-        self.download_client_btn = ttk.Button(
-            btn_frame, text="Download Client Jar", command=self.download_client, state=tk.DISABLED)
-        self.download_client_btn.grid(row=0, column=1, sticky="ew", padx=5)
-
-        self.tech_btn = ttk.Button(
-            btn_frame, text="Show Technical Details", command=self.show_technical, state=tk.DISABLED)
-        self.tech_btn.grid(row=0, column=2, sticky="ew", padx=(5,0))
-
-        self.all_versions = [] # Store the complete list of versions
-        self.current_display_versions = [] # Store the currently filtered/displayed versions
-        self.missing_versions_map = {} # Stores missing_servers data: id -> server_url
-        # NEW: Stores missing_clients data: id -> client_url & above (initially)
-        self.custom_client_versions = []
-
-        threading.Thread(target=self.load_versions, daemon=True).start()
-
-    def load_versions(self):
+PISTON_META_PACKAGES_URL = "https://piston-meta.mojang.com/v1/packages"
+STARTUP_MANIFEST_URLS = (MANIFEST_URL, MISSING_SERVERS_URL, MISSING_CLIENTS_URL)
+DOWNLOAD_SEGMENTS = 4 # Parallel Range requests per download
+DOWNLOAD_BLOCK_SIZE = 256 * 1024
+MIN_SEGMENT_SIZE = 1024 * 1024 # Files smaller than two of these are fetched in a single segment
+RESOURCES_URL = "https://resources.download.minecraft.net"
+DETAIL_WORKERS = 2 # Version JSON fetches for the selection that may run at once
+INSTALL_WORKERS = 16 # Concurrent library/asset downloads (and keep-alive connections per host)
+ZIP_TAIL_SIZE = 64 * 1024 + 22 # A ZIP's end of central directory record plus the longest possible comment
+MAX_MEMBER_SIZE = 4 * 1024 * 1024 # Largest jar member JarContents.read() inflates by default
+
+def _default_cache_dir():
+    """Per-user cache directory (LOCALAPPDATA on Windows, XDG_CACHE_HOME or ~/.cache elsewhere)."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "MinecraftVersionDownloader")
+
+CACHE_DIR = _default_cache_dir()
+NETWORK_TIMEOUT = 30 # seconds
+MIRROR_HOSTS = ("piston-meta.mojang.com", "piston-data.mojang.com", "launcher.mojang.com", "launchermeta.mojang.com",
+                "libraries.minecraft.net", "resources.download.minecraft.net", "magicdippyegg.github.io")
+MIRROR_MANIFEST_TTL = 60 # seconds a mirror serves a manifest before revalidating it upstream
+WATCH_INTERVAL = 300 # seconds between manifest polls in watch mode
+BASE_URL_ENV = "MCDOWNLOADER_BASE_URL"
+MIRRORS_ENV = "MCDOWNLOADER_MIRRORS"
+FETCH_RETRIES = 2 # Extra rounds over all sources after a failed one
+RETRY_BACKOFF = 0.5 # seconds before the first retry round, doubled for each one after
+HEDGE_PERCENTILE = 0.95 # A request slower than this share of the host's recent ones gets a hedge
+HEDGE_DELAY = 1.0 # seconds before hedging while a host has too few samples for a percentile
+HEDGE_MIN_DELAY = 0.02 # seconds; below this a hedge would mostly duplicate requests that were fine
+LATENCY_SAMPLES = 64 # Recent response times kept per host
+LATENCY_REPROBE = 20 # A source passed over this many times in a row is tried first once, to re-measure it
+
+_base_url = None # Set by set_base_url(); every upstream request then goes through that mirror
+_mirrors = () # Set by set_mirrors(); equivalent sources tried alongside the primary one
+
+def set_base_url(base_url):
+    """Routes all downloads through the mirror at base_url (see run_mirror); None goes direct again."""
+    global _base_url
+    _base_url = base_url.rstrip("/") if base_url else None
+
+def mirror_url(url):
+    """
+    Maps an upstream URL onto the configured mirror as <base>/<scheme>/<host>/<path>, so the
+    mirror can tell where to fetch it from. URLs already on the mirror are left alone.
+    """
+    if not _base_url or url.startswith(_base_url + "/"):
+        return url
+    return _mirror_link(_base_url, url)
+
+def set_mirrors(base_urls):
+    """
+    Adds equivalent mirrors for every download, as base URLs with the same
+    <base>/<scheme>/<host>/<path> layout as --base-url. None or () removes them again.
+    """
+    global _mirrors
+    _mirrors = tuple(base_url.rstrip("/") for base_url in base_urls or () if base_url)
+
+def upstream_url(url):
+    """The upstream URL behind a link on the base URL or one of the mirrors; any other URL (or None) as it is."""
+    for base_url in (_base_url,) + _mirrors:
+        if base_url and url and url.startswith(base_url + "/"):
+            scheme, _, rest = url[len(base_url) + 1:].partition("/")
+            if scheme in ("http", "https") and rest:
+                return f"{scheme}://{rest}"
+    return url
+
+def source_urls(url):
+    """
+    Every URL that serves the same bytes as url, primary first: the mirror_url() of url,
+    then url on each of the mirrors. A URL on one of them (like the links in a mirror's
+    manifest) is mapped back to its upstream URL first, so it gets the same sources.
+    """
+    url = upstream_url(url)
+    return list(dict.fromkeys([mirror_url(url)] + [_mirror_link(base_url, url) for base_url in _mirrors]))
+
+def _mirror_link(base_url, url):
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return url
+    return f"{base_url}/{parts.scheme}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+def _warn(message):
+    # stderr, so warnings never mix with the headless mode's JSON lines on stdout
+    print(f"Warning: {message}", file=sys.stderr)
+
+def _atomic_write(path, data):
+    """Writes bytes to path via a temporary file so readers never see a half-written file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class Span:
+    """
+    One timed step, as yielded by Metrics.span(). The code being timed adds the bytes it
+    moved, sets cache to the lookup outcome (e.g. "hit", "miss") and can mark() phases,
+    such as when the first response byte arrived.
+    """
+    __slots__ = ("name", "start", "bytes", "cache", "marks", "error")
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.bytes = 0
+        self.cache = None
+        self.marks = None
+        self.error = False
+
+    def mark(self, phase):
+        if self.marks is None:
+            self.marks = {}
+        self.marks[phase] = time.perf_counter() - self.start
+
+class Metrics:
+    """
+    Process-wide instrumentation: per-step timing spans (count, time, bytes, errors and
+    phase times), cache lookup outcomes, and the most recent spans for the diagnostics
+    panel. Recording is one lock and a few additions, so it stays on in normal use.
+    """
+    PREFIX = "mcdownloader"
+
+    def __init__(self, recent=200):
+        self._lock = threading.Lock()
+        self._spans = {} # name -> dict of running totals
+        self._caches = collections.defaultdict(collections.Counter) # cache name -> outcome -> lookups
+        self._recent = collections.deque(maxlen=recent)
+
+    @contextlib.contextmanager
+    def span(self, name):
+        span = Span(name)
         try:
-            self.load_progress.start(10)
-            mojang_versions = []
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            self._record(span, time.perf_counter() - span.start)
+
+    def cache(self, name, outcome):
+        """Counts a cache lookup that needs no span of its own (e.g. an in-memory hit)."""
+        with self._lock:
+            self._caches[name][outcome] += 1
+
+    def _record(self, span, seconds):
+        with self._lock:
+            stats = self._spans.get(span.name)
+            if stats is None:
+                stats = self._spans[span.name] = {"count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                  "bytes": 0, "phases": collections.Counter()}
+            stats["count"] += 1
+            stats["errors"] += span.error
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["bytes"] += span.bytes
+            if span.marks:
+                stats["phases"].update(span.marks)
+            if span.cache:
+                self._caches[span.name][span.cache] += 1
+            self._recent.append({"span": span.name, "time": round(time.time() - seconds, 3),
+                                 "seconds": round(seconds, 6), "bytes": span.bytes, "cache": span.cache,
+                                 "error": span.error})
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._caches.clear()
+            self._recent.clear()
+
+    def snapshot(self):
+        """Everything recorded so far as plain data, with averages and throughput filled in."""
+        with self._lock:
+            spans = {}
+            for name, stats in sorted(self._spans.items()):
+                spans[name] = dict(stats, phases=dict(stats["phases"]),
+                                   avg_seconds=stats["seconds"] / stats["count"],
+                                   mb_per_sec=round(stats["bytes"] / stats["seconds"] / 1e6, 3)
+                                   if stats["bytes"] and stats["seconds"] else None)
+            return {"spans": spans, "caches": {name: dict(c) for name, c in sorted(self._caches.items())},
+                    "recent": list(self._recent)}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """The totals in the Prometheus text exposition format."""
+        data = self.snapshot()
+        p = self.PREFIX
+        lines = []
+        def family(metric, kind, help_text, samples):
+            lines.append(f"# HELP {p}_{metric} {help_text}")
+            lines.append(f"# TYPE {p}_{metric} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{p}_{metric}{{{label_text}}} {value}")
+        spans = data["spans"].items()
+        family("span_count_total", "counter", "Times each step ran.",
+               [((("span", n),), s["count"]) for n, s in spans])
+        family("span_errors_total", "counter", "Times each step failed.",
+               [((("span", n),), s["errors"]) for n, s in spans])
+        family("span_seconds_total", "counter", "Time spent in each step.",
+               [((("span", n),), f"{s['seconds']:.6f}") for n, s in spans])
+        family("span_max_seconds", "gauge", "Longest single run of each step.",
+               [((("span", n),), f"{s['max_seconds']:.6f}") for n, s in spans])
+        family("span_bytes_total", "counter", "Bytes moved by each step.",
+               [((("span", n),), s["bytes"]) for n, s in spans])
+        family("span_phase_seconds_total", "counter", "Time from the start of a step to each marked phase.",
+               [((("span", n), ("phase", ph)), f"{t:.6f}") for n, s in spans for ph, t in sorted(s["phases"].items())])
+        family("cache_lookups_total", "counter", "Cache lookups by outcome.",
+               [((("cache", n), ("outcome", o)), c) for n, outcomes in data["caches"].items()
+                for o, c in sorted(outcomes.items())])
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+class HostLatency:
+    """
+    Response times per host: an exponentially weighted moving average, used to try the
+    fastest source first, and a window of recent samples for the hedge delay. A failed
+    request counts as a full timeout in the average, so a dead mirror sinks to the end;
+    every reprobe_after rankings it is tried first once, so a recovered one can climb back.
+    """
+    def __init__(self, alpha=0.3, samples=LATENCY_SAMPLES, reprobe_after=LATENCY_REPROBE):
+        self.alpha = alpha
+        self.samples = samples
+        self.reprobe_after = reprobe_after
+        self._average = {} # host -> seconds
+        self._recent = {} # host -> deque of seconds for successful requests
+        self._failures = collections.Counter()
+        self._failing = set() # Hosts whose last request failed
+        self._passed_over = collections.Counter() # host -> rankings in a row where it was not first
+        self._lock = threading.Lock()
+
+    def record(self, host, seconds):
+        with self._lock:
+            # Past the hedge point a slow response only costs the hedge delay, so the tail that
+            # hedging covers does not push an otherwise fast host down the ranking
+            cutoff = self._percentile(host, HEDGE_PERCENTILE)
+            self._update(host, seconds if cutoff is None else min(seconds, cutoff))
+            self._recent.setdefault(host, collections.deque(maxlen=self.samples)).append(seconds)
+            self._failing.discard(host)
+
+    def failed(self, host, penalty):
+        with self._lock:
+            self._update(host, penalty)
+            self._failures[host] += 1
+            self._failing.add(host)
+
+    def _update(self, host, seconds):
+        average = self._average.get(host)
+        self._average[host] = seconds if average is None else average + self.alpha * (seconds - average)
+
+    def percentile(self, host, fraction):
+        """The given fraction (0-1) of recent responses from host were at least this fast; None if too few."""
+        with self._lock:
+            return self._percentile(host, fraction)
+
+    def _percentile(self, host, fraction):
+        recent = sorted(self._recent.get(host, ()))
+        if len(recent) < 8:
+            return None
+        return recent[min(len(recent) - 1, int(fraction * len(recent)))]
+
+    def hedge_delay(self, host):
+        """
+        Seconds to wait for host before hedging: its HEDGE_PERCENTILE response time, or
+        HEDGE_DELAY while it has too few samples. If its last request failed (e.g. it is
+        being re-probed), the hedge goes out right away so nobody waits on a dead source.
+        """
+        with self._lock:
+            failing = host in self._failing
+        if failing:
+            return HEDGE_MIN_DELAY
+        delay = self.percentile(host, HEDGE_PERCENTILE)
+        return HEDGE_DELAY if delay is None else max(HEDGE_MIN_DELAY, delay)
+
+    def rank(self, urls):
+        """
+        urls ordered fastest host first. Hosts without a sample yet, or due for a re-probe,
+        go first (in their given order), so one slow response cannot sideline a source for good.
+        """
+        hosts = [urllib.parse.urlsplit(url).netloc for url in urls]
+        with self._lock:
+            keys = [0.0 if self._passed_over[host] >= self.reprobe_after else self._average.get(host, 0.0)
+                    for host in hosts]
+            order = sorted(range(len(urls)), key=lambda i: (keys[i], i))
+            self._passed_over[hosts[order[0]]] = 0
+            for i in order[1:]:
+                self._passed_over[hosts[i]] += 1
+        return [urls[i] for i in order]
+
+    def snapshot(self):
+        """host -> average and percentile response times (in seconds) and failure count."""
+        hosts = {}
+        with self._lock:
+            names = sorted(set(self._average) | set(self._failures))
+        for host in names:
+            hosts[host] = {"average": self._average.get(host), "p50": self.percentile(host, 0.5),
+                           "p95": self.percentile(host, 0.95), "samples": len(self._recent.get(host, ())),
+                           "failures": self._failures[host]}
+        return hosts
+
+def _retryable(error):
+    """True for HTTP errors worth another round of tries; any other status is the answer (e.g. 304, 404, 416)."""
+    return error.code >= 500 or error.code in (408, 429)
+
+def _source_failed(status):
+    """
+    True for HTTP statuses that count against the source and send the request on to the
+    next one: a mirror can be missing a file or refuse it (404, 403) while upstream has it.
+    A 416 is about the Range asked for, so it is the same everywhere.
+    """
+    return status >= 400 and status != 416
+
+class Fetcher:
+    """
+    Opens URLs for every download path in the tool. Each request has a timeout, failed
+    rounds are retried with exponential backoff, and where mirrors are configured (see
+    set_mirrors) the sources are tried fastest first with failover. A request whose first
+    source has not answered by the host's HEDGE_PERCENTILE response time is hedged: the
+    next source is asked too, the first answer wins and the other response is closed.
+    Only the time to the response headers is raced, so hedging a jar costs a request,
+    not a second copy of the body. A client error like 404 from one source fails over
+    to the next, but is not retried in later rounds.
+    """
+    def __init__(self, retries=FETCH_RETRIES, backoff=RETRY_BACKOFF, hedge=True, latency=None, workers=32):
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.latency = latency or HostLatency()
+        self.cancel = threading.Event() # Set by close(); requests then stop retrying
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+
+    def open(self, url, headers=None, timeout=NETWORK_TIMEOUT, pinned=False, retries=None):
+        """
+        Sends a GET for url and returns the response from whichever source answered first;
+        resp.url tells which one. With pinned=True only url itself is tried, for follow-up
+        requests (like the segments of a download) that must reach the same server.
+        retries overrides the number of retry rounds for callers that retry on their own.
+        """
+        sources = [url] if pinned else self.latency.rank(source_urls(url))
+        for attempt in range((self.retries if retries is None else retries) + 1):
+            if attempt:
+                if self.cancel.wait(self.backoff * 2 ** (attempt - 1)):
+                    break
+                METRICS.cache("fetch", "retry")
             try:
-                # Load main manifest
-                resp = urllib.request.urlopen(MANIFEST_URL)
-                manifest = json.load(resp)
-                mojang_versions = manifest["versions"]
-            except Exception as e:
-                messagebox.showwarning("Warning", f"Could not load official Mojang manifest:\n{e}. Only custom versions may be available.")
+                return self._race(sources, headers, timeout)
+            except urllib.error.HTTPError as e:
+                if not _retryable(e):
+                    raise
+                error = e
+            except (OSError, http.client.HTTPException) as e: # Includes timeouts and URLError
+                error = e
+        raise error
+
+    def _race(self, sources, headers, timeout):
+        if len(sources) == 1:
+            return self._attempt(sources[0], headers, timeout) # Nothing to hedge with; no thread hop
+        waiting = list(sources)
+        pending = {} # Future -> source
+        def launch():
+            source = waiting.pop(0)
+            pending[self._pool.submit(self._attempt, source, headers, timeout)] = source
+            return time.monotonic() + self.latency.hedge_delay(urllib.parse.urlsplit(source).netloc)
+
+        hedge_at = launch()
+        error = rejected = None # Last retryable failure, last client error (see _source_failed)
+        try:
+            while pending:
+                hedging = self.hedge and waiting
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=max(0.0, hedge_at - time.monotonic()) if hedging else None,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    METRICS.cache("fetch", "hedged")
+                    hedge_at = launch()
+                    continue
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        resp = future.result()
+                    except urllib.error.HTTPError as e:
+                        if _retryable(e):
+                            error = e
+                        elif _source_failed(e.code):
+                            rejected = e
+                        else:
+                            raise
+                    except (OSError, http.client.HTTPException) as e:
+                        error = e
+                    else:
+                        if source != sources[0]:
+                            METRICS.cache("fetch", "failover" if error or rejected else "hedge_won")
+                        return resp
+                if not pending and waiting:
+                    hedge_at = launch() # Everything asked so far failed; fail over right away
+            raise rejected or error # An answer from a source that is up says more than a dead one
+        finally:
+            for future in pending:
+                future.add_done_callback(_close_response) # Lost the race
 
-            # Load missing servers manifest
-            try:
-                resp_missing_servers = urllib.request.urlopen(MISSING_SERVERS_URL)
-                missing_data_servers = json.load(resp_missing_servers)
-                for entry in missing_data_servers.get("versions", []):
-                    self.missing_versions_map[entry["id"]] = entry["server_url"]
-            except Exception as e:
-                print(f"Warning: Failed to load fallback server list: {e}")
-                messagebox.showwarning("Warning", f"Could not load fallback server list:\n{e}")
+    def close(self):
+        """
+        Stops retrying and drops queued hedges, for shutting down: the pool's threads are
+        joined at exit, so without this a stalled fetch would keep the process alive
+        through every retry round. A request already on the wire still runs to its timeout.
+        """
+        self.cancel.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _attempt(self, url, headers, timeout):
+        host = urllib.parse.urlsplit(url).netloc
+        started = time.perf_counter()
+        try:
+            resp = urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if _source_failed(e.code):
+                self.latency.failed(host, timeout)
+            else:
+                self.latency.record(host, time.perf_counter() - started)
+            raise
+        except (OSError, http.client.HTTPException):
+            self.latency.failed(host, timeout)
+            raise
+        self.latency.record(host, time.perf_counter() - started)
+        return resp
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+FETCHER = Fetcher()
+
+def _upstream_manifest(doc):
+    """
+    A manifest served by a mirror with its download links mapped back to upstream (the
+    reverse of MirrorCache.rewritten_manifest), so it reads the same whichever source won.
+    """
+    if not isinstance(doc, dict) or not isinstance(doc.get("versions"), list):
+        return doc
+    versions = []
+    for entry in doc["versions"]:
+        if isinstance(entry, dict):
+            entry = dict(entry)
+            for key in ("url", "server_url", "client_url"):
+                if isinstance(entry.get(key), str):
+                    entry[key] = upstream_url(entry[key])
+        versions.append(entry)
+    return dict(doc, versions=versions)
+
+# Outcome of a manifest fetch: 'fresh' (downloaded), 'not-modified' (304, served from cache),
+# 'offline' (network failed, served from cache) or 'failed' (no response and nothing cached).
+ManifestResult = collections.namedtuple("ManifestResult", "url data status error")
+
+class ManifestLoader:
+    """
+    Fetches JSON manifests in parallel and keeps every response on disk together with
+    its ETag/Last-Modified, so later launches can revalidate with a conditional GET
+    and still work from the cached copy when the network is unavailable.
+    """
+    def __init__(self, cache_dir=None, timeout=NETWORK_TIMEOUT):
+        self.cache_dir = os.path.join(cache_dir or CACHE_DIR, "manifests")
+        self.timeout = timeout
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return (os.path.join(self.cache_dir, key + ".json"),
+                os.path.join(self.cache_dir, key + ".meta.json"))
+
+    def load_cached(self, url):
+        """Returns the cached document for url, or None if nothing usable is cached."""
+        body_path, _ = self._paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
 
-            # NEW: Load missing clients manifest
+    def _load_meta(self, url):
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def fetch(self, url):
+        """Revalidates (or downloads) a single manifest and returns a ManifestResult."""
+        cached = self.load_cached(url)
+        headers = {}
+        if cached is not None:
+            meta = self._load_meta(url)
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        with METRICS.span("manifest.fetch") as span:
             try:
-                resp_missing_clients = urllib.request.urlopen(MISSING_CLIENTS_URL)
-                missing_data_clients = json.load(resp_missing_clients)
-                # Store custom clients to be merged and sorted
-                self.custom_client_versions = missing_data_clients.get("versions", [])
+                with FETCHER.open(url, headers, self.timeout) as resp:
+                    span.mark("first_byte") # DNS, connect, TLS and server time
+                    raw = resp.read()
+                    headers = resp.headers
+                    source = resp.url
+                span.bytes = len(raw)
+                with METRICS.span("manifest.parse") as parse:
+                    parse.bytes = len(raw)
+                    data = json.loads(raw)
+                    if source != url:
+                        # A mirror's copy links to the mirror; cache it as upstream's
+                        data = _upstream_manifest(data)
+                        raw = json.dumps(data).encode("utf-8")
+                span.cache = "miss"
+            except urllib.error.HTTPError as e:
+                span.cache = "hit" if e.code == 304 else "stale"
+                span.error = e.code != 304
+                if cached is None:
+                    return ManifestResult(url, None, "failed", e)
+                return ManifestResult(url, cached, "not-modified" if e.code == 304 else "offline", None)
             except Exception as e:
-                print(f"Warning: Failed to load custom client list: {e}")
-                messagebox.showwarning("Warning", f"Could not load custom client list:\n{e}")
-
-            # NEW: Merge and sort all versions (Mojang + custom clients)
-            self.all_versions = self._merge_and_sort_versions(mojang_versions, self.custom_client_versions)
+                # Covers DNS/connection errors, timeouts and a corrupt response body alike
+                span.cache = "stale"
+                span.error = True
+                if cached is None:
+                    return ManifestResult(url, None, "failed", e)
+                return ManifestResult(url, cached, "offline", None)
+
+        body_path, meta_path = self._paths(url)
+        try:
+            _atomic_write(body_path, raw)
+            meta = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+            _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            _warn(f"Could not write manifest cache for {url}: {e}")
+        return ManifestResult(url, data, "fresh", None)
+
+    def signature(self, urls):
+        """
+        Identifies the cached copies of urls by size and modification time, without parsing
+        them; None if any is missing. Anything built from the cache can be tagged with this
+        to tell later whether the cache has changed underneath it.
+        """
+        parts = []
+        for url in urls:
+            body_path, _ = self._paths(url)
+            try:
+                st = os.stat(body_path)
+            except OSError:
+                return None
+            parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def fetch_all(self, urls):
+        """Fetches all urls concurrently; returns a dict of url -> ManifestResult."""
+        urls = list(urls)
+        with ThreadPoolExecutor(max_workers=max(1, len(urls))) as pool:
+            results = list(pool.map(self.fetch, urls))
+        return {r.url: r for r in results}
+
+class VersionJsonCache:
+    """
+    Content-addressed cache for per-version JSON documents, keyed by the sha1 that the
+    manifest already lists for each version. A small in-memory LRU sits in front of
+    the on-disk store, and the disk store is capped by evicting least recently used files.
+    Entries without a sha1 (custom clients, v1 manifests) are fetched but never cached.
+    """
+    def __init__(self, cache_dir=None, memory_entries=64, max_disk_bytes=64 * 1024 * 1024,
+                 timeout=NETWORK_TIMEOUT):
+        self.cache_dir = os.path.join(cache_dir or CACHE_DIR, "versions")
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.timeout = timeout
+        self._memory = collections.OrderedDict() # sha1 -> parsed JSON, most recently used last
+        self._disk_bytes = None # Computed lazily on the first write
+        self._lock = threading.Lock()
+        self._inflight = {} # key -> Future of a fetch in progress, shared by concurrent callers
+
+    def _path(self, sha1):
+        return os.path.join(self.cache_dir, sha1[:2], sha1 + ".json")
+
+    def _remember(self, sha1, vjson):
+        with self._lock:
+            self._memory[sha1] = vjson
+            self._memory.move_to_end(sha1)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def is_cached(self, entry):
+        """True if entry's JSON can be served without touching the network."""
+        sha1 = entry.get("sha1")
+        if not sha1:
+            return False
+        with self._lock:
+            if sha1 in self._memory:
+                return True
+        return os.path.exists(self._path(sha1))
+
+    def get(self, entry):
+        """
+        Returns the parsed version JSON for a manifest entry, fetching it only on a cache miss.
+        Concurrent calls for the same entry (e.g. a click and a prefetch) share one fetch.
+        """
+        key = entry.get("sha1") or entry["url"]
+        with self._lock:
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = Future()
+        if not owner:
+            return flight.result()
+        try:
+            vjson = self._get(entry)
+            flight.set_result(vjson)
+            return vjson
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _get(self, entry):
+        sha1 = entry.get("sha1")
+        if sha1:
+            with self._lock:
+                vjson = self._memory.get(sha1)
+                if vjson is not None:
+                    self._memory.move_to_end(sha1)
+            if vjson is not None:
+                METRICS.cache("version_json", "memory")
+                return vjson
+            path = self._path(sha1)
+            try:
+                f = open(path, "rb")
+            except OSError:
+                f = None # Not on disk; only reads of files that exist are timed
+            if f is not None:
+                try:
+                    with f, METRICS.span("version_json.disk") as span:
+                        raw = f.read()
+                        span.bytes = len(raw)
+                        vjson = json.loads(raw)
+                    os.utime(path) # Keeps the mtime usable as an LRU clock for eviction
+                    self._remember(sha1, vjson)
+                    METRICS.cache("version_json", "disk")
+                    return vjson
+                except (OSError, ValueError):
+                    pass
+
+        METRICS.cache("version_json", "miss")
+        with METRICS.span("version_json.fetch") as span:
+            with FETCHER.open(entry["url"], timeout=self.timeout) as resp:
+                span.mark("first_byte")
+                raw = resp.read()
+            span.bytes = len(raw)
+            vjson = json.loads(raw)
+        if sha1:
+            if hashlib.sha1(raw).hexdigest() == sha1:
+                self._store(sha1, raw)
+                self._remember(sha1, vjson)
+            else:
+                _warn(f"SHA1 mismatch for {entry.get('id')} version JSON, not caching it")
+        return vjson
 
-            self.update_version_list(self.all_versions)
+    def _store(self, sha1, raw):
+        try:
+            _atomic_write(self._path(sha1), raw)
+        except OSError as e:
+            _warn(f"Could not write version cache: {e}")
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, _, size in self._scan_disk())
+            else:
+                self._disk_bytes += len(raw)
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict()
+
+    def _scan_disk(self):
+        """Yields (mtime, path, size) for every cached document."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, path, st.st_size
+
+    def _evict(self):
+        """Deletes least recently used documents until the store is back under 90% of its cap."""
+        with self._lock:
+            entries = sorted(self._scan_disk())
+            total = sum(size for _, _, size in entries)
+            target = self.max_disk_bytes * 0.9
+            for _, path, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._disk_bytes = total
+
+class VersionPrefetcher:
+    """
+    Warms a VersionJsonCache in the background. Only the most recent prefetch() call
+    matters: queued work from earlier calls is skipped once a newer one comes in, so
+    holding an arrow key does not build up a backlog of stale fetches.
+    """
+    def __init__(self, cache, workers=2):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._generation = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def prefetch(self, entries):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        for entry in entries:
+            if not entry.get("sha1") or self.cache.is_cached(entry):
+                continue
+            with self._lock:
+                if entry["sha1"] in self._pending:
+                    continue
+                self._pending.add(entry["sha1"])
+            self._pool.submit(self._warm, entry, generation)
+
+    def _warm(self, entry, generation):
+        try:
+            if generation == self._generation:
+                self.cache.get(entry)
         except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred during loading:\n{e}")
+            _warn(f"Prefetch of {entry.get('id')} failed: {e}")
         finally:
-            self.load_progress.stop()
-            self.load_progress.grid_remove()
-
-    def _merge_and_sort_versions(self, mojang_versions, custom_versions):
+            with self._lock:
+                self._pending.discard(entry["sha1"])
+
+    def close(self):
+        """Drops queued prefetches; one already running finishes on its own."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class RateLimiter:
+    """
+    Token bucket shared by any number of download threads. consume() blocks the caller
+    long enough to keep the combined throughput at or below bytes_per_sec.
+    """
+    def __init__(self, bytes_per_sec):
+        self.rate = float(bytes_per_sec)
+        self.capacity = max(self.rate, DOWNLOAD_BLOCK_SIZE) # Allow about a second of burst
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going into debt lets blocks larger than the bucket through; the caller pays it off by sleeping
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+
+class DetailLoader:
+    """
+    Loads version JSON for whatever is currently selected, on a small bounded pool.
+    Every request() gets a generation number; a newer request cancels the previous one
+    if it has not started yet, and callbacks only fire for the latest generation, so a
+    burst of selection changes (holding an arrow key) cannot deliver stale details.
+    Requests for a version that is already being fetched share the running fetch.
+    """
+    def __init__(self, version_cache, workers=DETAIL_WORKERS):
+        self.version_cache = version_cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="details")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current = None # Future of the latest request
+        self._inflight = {} # key -> Future
+
+    @property
+    def generation(self):
+        """The token of the latest request; compare against it before applying a result."""
+        return self._generation
+
+    def request(self, v, callback):
         """
-        Merges Mojang versions and custom client versions, then sorts them
-        respecting the 'above' dependency for custom clients.
-        Custom versions will generally appear *before* their 'above' target if possible,
-        or at the beginning if no 'above' target is found or if the target is not in the list.
+        Loads the JSON for manifest entry v and calls callback(v, vjson, error, generation),
+        unless another request has been made by then. Entries without a Mojang URL
+        complete with an empty dict. The callback usually runs on a worker thread.
         """
-        # Create a dictionary for quick lookup of all versions (official + custom, by ID)
-        all_versions_map = {v["id"]: v for v in mojang_versions}
-        for v in custom_versions:
-            all_versions_map[v["id"]] = v # Custom versions can overwrite or add new IDs
-
-        final_ordered_versions = []
-        # Keep track of versions already added to the final list to avoid duplicates
-        added_to_final = set()
-
-        # Simple approach for sorting:
-        # First, add all official Mojang versions.
-        for v in mojang_versions:
-            final_ordered_versions.append(v)
-            added_to_final.add(v["id"])
-
-        # Now, iterate through custom versions and try to insert them based on 'above'.
-        # We need a robust way to insert. We can build a graph for a proper topological sort,
-        # but for simple 'above' cases, we can repeatedly try to insert until no more can be placed.
-
-        # Create a list of custom versions that still need to be placed.
-        unplaced_custom_versions = [v for v in custom_versions if v["id"] not in added_to_final]
-
-        # Loop to try placing versions that have an 'above' dependency.
-        # This will run as long as we successfully place versions in an iteration.
-        placed_this_iteration = True
-        while placed_this_iteration and unplaced_custom_versions:
-            placed_this_iteration = False
-            next_unplaced_custom = [] # Collect versions that still can't be placed this round
-
-            for custom_v in unplaced_custom_versions:
-                custom_id = custom_v["id"]
-                above_id = custom_v.get("above")
-
-                if above_id and above_id in added_to_final:
-                    # Find the index of the 'above_id' version in the current final list
-                    insert_index = -1
-                    for i, v_in_final in enumerate(final_ordered_versions):
-                        if v_in_final["id"] == above_id:
-                            insert_index = i
-                            break
-
-                    if insert_index != -1:
-                        # Insert the custom version directly before its 'above' target
-                        final_ordered_versions.insert(insert_index, custom_v)
-                        added_to_final.add(custom_id)
-                        placed_this_iteration = True
-                    else:
-                        # Should not happen if above_id is in added_to_final, but for safety
-                        next_unplaced_custom.append(custom_v)
-                elif not above_id:
-                    # If no 'above' specified, or 'above' target not found in the manifest,
-                    # simply append it to the beginning of the list.
-                    # This will put them at the very top if no 'above' constraint pulls them down.
-                    final_ordered_versions.insert(0, custom_v)
-                    added_to_final.add(custom_id)
-                    placed_this_iteration = True
-                else: # above_id is specified but not yet in the final list
-                    next_unplaced_custom.append(custom_v)
-
-            unplaced_custom_versions = next_unplaced_custom # Update for the next iteration
-
-        # Any remaining custom versions that could not be placed due to missing 'above' targets
-        # or complex unresolvable dependencies will be appended to the very end.
-        for v in unplaced_custom_versions:
-            if v["id"] not in added_to_final: # Double check to avoid accidental duplicates
-                final_ordered_versions.append(v)
-                added_to_final.add(v["id"])
-
-
-        return final_ordered_versions
-
-    def update_version_list(self, versions_to_display):
-        """Clears and repopulates the Treeview with the given list of versions."""
-        for item in self.vers_list.get_children():
-            self.vers_list.delete(item)
-        self.current_display_versions = versions_to_display
-        for idx, v in enumerate(self.current_display_versions):
-            # Ensure custom client versions have 'type' and 'releaseTime' for display
-            display_type = v.get("type", "Custom Client") # Default type for custom
-            display_time = v.get("releaseTime", "N/A")    # Default time for custom
-            self.vers_list.insert("", "end", iid=idx,
-                values=(v["id"], display_type, display_time))
-
-    def perform_search_event(self, event):
-        """Called when Enter key is pressed in the search entry."""
-        self.search_versions()
-
-    def search_versions(self):
-        search_term = self.search_entry.get().strip().lower()
-        if not search_term:
-            self.update_version_list(self.all_versions) # Show all if search is empty
+        key = v.get("sha1") or v.get("url") or v["id"]
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            future = self._inflight.get(key)
+            started = future is None
+            if started:
+                future = self._pool.submit(self._load, v)
+                self._inflight[key] = future
+            previous, self._current = self._current, future
+        if started:
+            # Outside the lock: a future that is already done runs the callback right here
+            future.add_done_callback(lambda f, key=key: self._forget(key, f))
+        if previous is not None and previous is not future:
+            previous.cancel() # Only succeeds while it is still queued
+        future.add_done_callback(lambda f: self._deliver(f, v, generation, callback))
+        return generation
+
+    def _load(self, v):
+        return self.version_cache.get(v) if "url" in v else {}
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _deliver(self, future, v, generation, callback):
+        if future.cancelled() or generation != self._generation:
             return
-
-        filtered_versions = [
-            v for v in self.all_versions
-            if search_term in v["id"].lower() or
-               search_term in v.get("type", "").lower() # Handle missing 'type' for custom versions
-        ]
-        self.update_version_list(filtered_versions)
-        self.show_details("") # Clear details when search changes
-        # Disable buttons until a new selection is made
-        self.download_server_btn.config(state=tk.DISABLED)
-        self.download_client_btn.config(state=tk.DISABLED)
-        self.tech_btn.config(state=tk.DISABLED)
-
-
-    def on_select(self, ev):
-        sel = self.vers_list.selection()
-        if not sel:
-            # Clear details and disable buttons if nothing is selected (e.g., after a search)
-            self.show_details("")
-            self.download_server_btn.config(state=tk.DISABLED)
-            self.download_client_btn.config(state=tk.DISABLED)
-            self.tech_btn.config(state=tk.DISABLED)
+        error = future.exception()
+        callback(v, None if error else future.result(), error, generation)
+
+    def close(self):
+        """Drops queued requests; one already running finishes on its own."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class ChecksumError(IOError):
+    """A download did not match the size or SHA1 published for it."""
+
+class ChangedOnServer(IOError):
+    """A file changed on the server while it was being downloaded in segments."""
+
+class DownloadCancelled(IOError):
+    """A download was stopped through its cancel event; what was written is kept for resuming."""
+
+class SegmentedDownloader:
+    """
+    Downloads a file over several parallel HTTP Range requests into '<path>.part'.
+    Progress is persisted to '<path>.part.json', so an interrupted download resumes
+    where it stopped when the same file is requested again. Servers that ignore Range
+    requests get a single stream instead. progress(done_bytes, total_bytes) is called
+    from the worker threads after every block; total_bytes is None if unknown.
+
+    The SHA1 is computed while the file is written: blocks that arrive in file order
+    go straight into the hash, and bytes a later segment wrote ahead of that point are
+    hashed from the page cache as soon as the earlier segments reach them. download()
+    returns the hex digest and raises ChecksumError if it does not match expected_sha1.
+
+    Setting the cancel event stops every worker at its next block with DownloadCancelled,
+    so a closing GUI does not wait for the segment threads to finish the file.
+    """
+    def __init__(self, segments=DOWNLOAD_SEGMENTS, block_size=DOWNLOAD_BLOCK_SIZE,
+                 min_segment_size=MIN_SEGMENT_SIZE, timeout=NETWORK_TIMEOUT, rate_limiter=None, cancel=None):
+        self.segments = max(1, segments)
+        self.block_size = block_size
+        self.min_segment_size = min_segment_size
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter # Optional RateLimiter shared with other downloads
+        self.cancel = cancel if cancel is not None else threading.Event()
+
+    def _check_cancelled(self):
+        if self.cancel.is_set():
+            raise DownloadCancelled("Download cancelled")
+
+    def download(self, url, path, progress=None, expected_sha1=None, expected_size=None):
+        with METRICS.span("jar.download") as span:
+            digest = self._download(url, path, progress, expected_sha1, expected_size, span)
+            span.bytes = os.path.getsize(path)
+        return digest
+
+    def _download(self, url, path, progress, expected_sha1, expected_size, span):
+        part_path = path + ".part"
+        # Probe with a one-byte range: a 206 tells us the size and that ranges work
+        try:
+            resp = FETCHER.open(url, {"Range": "bytes=0-0"}, self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 416: # 416 is what an empty file answers; fetch it normally
+                raise
+            resp = FETCHER.open(url, timeout=self.timeout)
+        span.mark("first_byte")
+        url = resp.url # Whichever source answered; the segments must agree with its validator
+        total = None
+        if resp.status == 206:
+            total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+            total = int(total) if total.isdigit() else None
+            if total is None:
+                # A partial body without a usable size (e.g. 'bytes 0-0/*'): plan no segments
+                # and fetch the whole file from the same source instead
+                resp.close()
+                resp = FETCHER.open(url, timeout=self.timeout, pinned=True)
+        with resp:
+            if total is None:
+                # No usable range support: this response already carries the whole body
+                digest = self._stream(resp, part_path, progress)
+            else:
+                if expected_size is not None and total != expected_size:
+                    raise ChecksumError(f"Server reports {total} bytes, expected {expected_size}")
+                validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        if total is not None:
+            digest = self._download_ranges(url, part_path, total, validator, progress)
+
+        if expected_sha1 and digest != expected_sha1.lower():
+            self._discard(part_path)
+            raise ChecksumError(f"SHA1 mismatch: expected {expected_sha1}, got {digest}")
+        os.replace(part_path, path)
+        return digest
+
+    def _discard(self, part_path):
+        for leftover in (part_path, part_path + ".json"):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+
+    def _stream(self, resp, part_path, progress):
+        length = resp.headers.get("Content-Length")
+        total = int(length) if length and length.isdigit() else None
+        sha1 = hashlib.sha1()
+        done = 0
+        with open(part_path, "wb") as f:
+            while True:
+                self._check_cancelled()
+                block = resp.read(self.block_size)
+                if not block:
+                    break
+                if self.rate_limiter:
+                    self.rate_limiter.consume(len(block))
+                f.write(block)
+                sha1.update(block)
+                done += len(block)
+                if progress:
+                    progress(done, total)
+        if total is not None and done != total:
+            raise IOError(f"Download incomplete: got {done} of {total} bytes")
+        return sha1.hexdigest()
+
+    def _plan(self, url, part_path, state_path, total, validator):
+        """Returns the saved segment list if it belongs to this file, else a fresh one."""
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if (state["url"] == url and state["size"] == total and state.get("validator") == validator
+                    and os.path.getsize(part_path) == total):
+                return state["segments"]
+        except (OSError, ValueError, KeyError):
+            pass
+        with open(part_path, "wb") as f:
+            f.truncate(total)
+        count = max(1, min(self.segments, total // max(1, self.min_segment_size)))
+        bounds = [total * i // count for i in range(count + 1)]
+        # [first byte, last byte, bytes already written]
+        return [[bounds[i], bounds[i + 1] - 1, 0] for i in range(count)]
+
+    def _download_ranges(self, url, part_path, total, validator, progress):
+        state_path = part_path + ".json"
+        segments = self._plan(url, part_path, state_path, total, validator)
+        lock = threading.Lock()
+        status = {"done": sum(seg[2] for seg in segments), "saved_at": 0.0}
+        hash_lock = threading.Lock()
+        hashed = {"sha1": hashlib.sha1(), "upto": 0} # Every byte before 'upto' is in the hash
+
+        def save_state():
+            state = {"url": url, "size": total, "validator": validator, "segments": segments}
+            _atomic_write(state_path, json.dumps(state).encode("utf-8"))
+
+        def hash_written():
+            # Called with hash_lock held: hashes bytes that were written ahead of 'upto'
+            reader = None
+            try:
+                for seg in segments:
+                    if not seg[0] <= hashed["upto"] <= seg[1]:
+                        continue
+                    written_end = seg[0] + seg[2]
+                    if hashed["upto"] >= written_end:
+                        break
+                    if reader is None:
+                        reader = open(part_path, "rb")
+                    reader.seek(hashed["upto"])
+                    while hashed["upto"] < written_end:
+                        block = reader.read(min(self.block_size, written_end - hashed["upto"]))
+                        hashed["sha1"].update(block)
+                        hashed["upto"] += len(block)
+                    if written_end <= seg[1]:
+                        break # This segment is still downloading
+            finally:
+                if reader is not None:
+                    reader.close()
+
+        def fetch_segment(seg):
+            # A connection that stalls or drops mid-segment is resumed from the last byte written
+            for attempt in range(FETCHER.retries + 1):
+                try:
+                    return fetch_range(seg)
+                except (ChangedOnServer, DownloadCancelled):
+                    raise
+                except (OSError, http.client.HTTPException):
+                    if attempt == FETCHER.retries:
+                        raise
+                    METRICS.cache("fetch", "retry")
+                    if self.cancel.wait(FETCHER.backoff * 2 ** attempt):
+                        raise DownloadCancelled("Download cancelled")
+
+        def fetch_range(seg):
+            start, end = seg[0] + seg[2], seg[1]
+            if start > end:
+                return
+            self._check_cancelled()
+            headers = {"Range": f"bytes={start}-{end}"}
+            if validator:
+                headers["If-Range"] = validator # A changed file comes back as 200 instead of 206
+            with FETCHER.open(url, headers, self.timeout, pinned=True, retries=0) as resp, \
+                    open(part_path, "r+b", buffering=0) as f:
+                if resp.status != 206:
+                    raise ChangedOnServer("File changed on the server during download, please try again")
+                f.seek(start)
+                while start <= end:
+                    self._check_cancelled()
+                    block = resp.read(min(self.block_size, end - start + 1))
+                    if not block:
+                        raise IOError(f"Connection closed at byte {start} of {total}")
+                    if self.rate_limiter:
+                        self.rate_limiter.consume(len(block))
+                    f.write(block)
+                    with lock:
+                        seg[2] += len(block)
+                        status["done"] += len(block)
+                        done = status["done"]
+                        if time.monotonic() - status["saved_at"] > 1.0:
+                            status["saved_at"] = time.monotonic()
+                            save_state()
+                    with hash_lock:
+                        if hashed["upto"] == start:
+                            hashed["sha1"].update(block)
+                            hashed["upto"] += len(block)
+                        hash_written()
+                    start += len(block)
+                    if progress:
+                        progress(done, total)
+
+        if progress:
+            progress(status["done"], total)
+        with hash_lock:
+            hash_written() # Catches up on whatever a resumed download already has
+        with ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix="segment") as pool:
+            futures = [pool.submit(fetch_segment, seg) for seg in segments]
+        errors = [f.exception() for f in futures if f.exception()]
+        if errors:
+            with lock:
+                save_state() # Lets the next attempt resume from here
+            raise errors[0]
+
+        with hash_lock:
+            hash_written()
+        if hashed["upto"] != total:
+            raise IOError(f"Download incomplete: hashed {hashed['upto']} of {total} bytes")
+        try:
+            os.remove(state_path)
+        except OSError:
+            pass
+        return hashed["sha1"].hexdigest()
+
+def _reflink(src, dst):
+    """Copy-on-write clone of src to dst (Linux FICLONE); raises OSError where unsupported."""
+    import fcntl # Not available on Windows, where the ImportError is turned into OSError below
+    FICLONE = 0x40049409
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+class JarStore:
+    """
+    Content-addressed store of verified jars, keyed by SHA1 (<cache>/jars/ab/abcdef....jar).
+    fetch() downloads into the store with checksum verification, then gives the save
+    path a reflink (copy-on-write clone) of the stored file, falling back to a hardlink
+    and finally a copy. A jar that is already in the store is linked without any network I/O.
+
+    Stored jars are made read-only and their size and mtime are recorded in a '.ok' marker
+    next to them. A hardlinked save path shares the stored file, so a jar edited in place
+    through it (as modding tools do) would otherwise be served as verified from then on;
+    one whose marker no longer matches is hashed again and downloaded anew if it changed.
+    """
+    def __init__(self, downloader, cache_dir=None):
+        self.downloader = downloader
+        self.root = os.path.join(cache_dir or CACHE_DIR, "jars")
+        self._locks = {} # sha1 -> lock, so concurrent requests for one jar download it once
+        self._locks_guard = threading.Lock()
+
+    def path_for(self, sha1):
+        sha1 = sha1.lower()
+        return os.path.join(self.root, sha1[:2], sha1 + ".jar")
+
+    def has(self, sha1, size=None):
+        """Whether the jar is stored, and has the given size if one is given."""
+        stored = self.path_for(sha1)
+        if not os.path.isfile(stored):
+            return False
+        try:
+            return size is None or os.path.getsize(stored) == size
+        except OSError:
+            return False
+
+    def fetch(self, url, path, sha1, size=None, progress=None):
+        """Puts the jar with this SHA1 at path. Returns True if it came from the store."""
+        stored = self.path_for(sha1)
+        with self._locks_guard:
+            lock = self._locks.setdefault(sha1.lower(), threading.Lock())
+        with lock:
+            from_store = self.has(sha1, size) and self._intact(stored, sha1)
+            METRICS.cache("jar_store", "hit" if from_store else "miss")
+            if not from_store:
+                self._discard(stored)
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                self.downloader.download(url, stored, progress=progress, expected_sha1=sha1, expected_size=size)
+                self._seal(stored)
+        with METRICS.span("jar.link"):
+            self.link(stored, path)
+        return from_store
+
+    @staticmethod
+    def _stamp(stored):
+        st = os.stat(stored)
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def _seal(self, stored):
+        os.chmod(stored, 0o444)
+        _atomic_write(stored + ".ok", self._stamp(stored).encode("utf-8"))
+
+    def _intact(self, stored, sha1):
+        """Whether the stored jar is unchanged since it was verified; hashes it if that is not certain."""
+        try:
+            with open(stored + ".ok", "rb") as f:
+                if f.read().decode("utf-8") == self._stamp(stored):
+                    return True
+        except (OSError, UnicodeDecodeError):
+            pass
+        digest = hashlib.sha1()
+        try:
+            with open(stored, "rb") as f:
+                for block in iter(lambda: f.read(DOWNLOAD_BLOCK_SIZE), b""):
+                    digest.update(block)
+            if digest.hexdigest() != sha1.lower():
+                _warn(f"Stored jar {stored} was modified; downloading it again")
+                return False
+            self._seal(stored)
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _discard(stored):
+        for leftover in (stored, stored + ".ok"):
+            try:
+                os.chmod(leftover, 0o644) # Windows cannot remove a read-only file
+                os.remove(leftover)
+            except OSError:
+                pass
+
+    @staticmethod
+    def link(stored, path):
+        if os.path.abspath(stored) == os.path.abspath(path):
             return
-
-        idx = int(sel[0])
-        # Ensure we access the correct version from the currently displayed list
-        if idx >= len(self.current_display_versions):
-            return # Index out of bounds if selection was made on old list
-        v = self.current_display_versions[idx]
-
-        # Reset state and show loading message immediately
-        self.show_details(f"Loading details for {v['id']}...")
-        self.download_server_btn.config(state=tk.DISABLED)
-        self.download_client_btn.config(state=tk.DISABLED)
-        self.tech_btn.config(state=tk.DISABLED)
-
-        # Store the currently selected version's raw data for the thread
-        self.current_selected_version_data = v
-
-        # Start a new thread to load version details
-        threading.Thread(target=self._load_version_details_thread, daemon=True).start()
-
-    def _load_version_details_thread(self):
-        # Retrieve the version data that was stored by on_select
-        v = self.current_selected_version_data
-
-        vjson = {} # Details from Mojang's full version JSON
-        client_url = None
-        server_url = None
-        tech_info = []
-        mojang_details_loaded = False
-        message_prefix = "" # To prepend to details text if there's a warning
-
-        # Try to load full Mojang details if this version has a 'url' field (which Mojang versions do)
-        if 'url' in v:
+        if os.path.lexists(path):
+            try:
+                os.remove(path)
+            except PermissionError: # A read-only hardlink to the store, on Windows
+                os.chmod(path, 0o644)
+                os.remove(path)
+                os.chmod(stored, 0o444)
+        try:
+            _reflink(stored, path) # An edit to the saved jar cannot reach the stored one
+            return
+        except (OSError, ImportError):
+            if os.path.lexists(path):
+                os.remove(path)
+        try:
+            os.link(stored, path)
+            return
+        except (OSError, AttributeError):
+            pass # Different volume, or a filesystem without hardlinks
+        shutil.copyfile(stored, path)
+
+# One entry of a jar's central directory; method is 0 (stored) or 8 (deflated).
+JarEntry = collections.namedtuple("JarEntry", "name size compressed_size method crc header_offset")
+
+class _RemoteFile:
+    """
+    Byte ranges of a remote file via HTTP Range requests. The first request picks the
+    source (see Fetcher); later ones stay on it and are checked against its validator.
+    """
+    def __init__(self, url, size=None, timeout=NETWORK_TIMEOUT):
+        self.url = url
+        self.size = size
+        self.timeout = timeout
+        self.validator = None
+        self.fetched = 0 # Bytes transferred so far
+
+    def tail(self, length):
+        """The last length bytes, or the whole file if it is shorter; sets size if it was unknown."""
+        if self.size is not None:
+            range_header = f"bytes={max(0, self.size - length)}-{self.size - 1}"
+        else:
+            range_header = f"bytes=-{length}"
+        with FETCHER.open(self.url, {"Range": range_header}, self.timeout) as resp:
+            if resp.status != 206:
+                raise IOError("The server does not support Range requests, so the jar cannot be inspected "
+                              "without downloading it")
+            total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+            if not total.isdigit():
+                raise IOError("The server did not report the jar's size")
+            self.size = int(total)
+            self.url = resp.url
+            self.validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+            data = resp.read()
+        self.fetched += len(data)
+        return data
+
+    def read(self, offset, length):
+        headers = {"Range": f"bytes={offset}-{offset + length - 1}"}
+        if self.validator:
+            headers["If-Range"] = self.validator
+        with FETCHER.open(self.url, headers, self.timeout, pinned=True) as resp:
+            if resp.status != 206:
+                raise ChangedOnServer("The jar changed on the server while it was being inspected")
+            data = resp.read()
+        self.fetched += len(data)
+        return data
+
+    def close(self):
+        pass
+
+class _MappedFile:
+    """A local file mapped into memory; reads are slices, so only the pages touched come off the disk."""
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.fetched = 0
+
+    def tail(self, length):
+        return self.read(max(0, self.size - length), length)
+
+    def read(self, offset, length):
+        data = self._map[offset:offset + length]
+        self.fetched += len(data)
+        return data
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+class JarContents:
+    """
+    What is inside a jar, read from its ZIP central directory without touching the
+    rest of the file: the entries, the main manifest attributes and, for the bundler
+    server jars of newer versions, the nested server and libraries. Remote jars
+    (from_url) cost one or two Range requests for the directory and one per member read;
+    local ones (from_path) are memory-mapped. fetched counts the bytes actually read.
+    """
+    def __init__(self, source):
+        self._source = source
+        try:
+            with METRICS.span("jar.inspect") as span:
+                self.entries = self._read_directory()
+                span.bytes = source.fetched
+        except BaseException:
+            source.close()
+            raise
+        self.by_name = {entry.name: entry for entry in self.entries}
+
+    @classmethod
+    def from_url(cls, url, size=None, timeout=NETWORK_TIMEOUT):
+        return cls(_RemoteFile(url, size, timeout))
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(_MappedFile(path))
+
+    @property
+    def size(self):
+        return self._source.size
+
+    @property
+    def fetched(self):
+        return self._source.fetched
+
+    def close(self):
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_directory(self):
+        tail = self._source.tail(ZIP_TAIL_SIZE)
+        tail_offset = self._source.size - len(tail)
+        # The record is 22 bytes plus a comment; search backwards for one whose comment ends the file
+        eocd = tail.rfind(b"PK\x05\x06")
+        while eocd >= 0 and (len(tail) - eocd < 22
+                             or eocd + 22 + struct.unpack_from("<H", tail, eocd + 20)[0] != len(tail)):
+            eocd = tail.rfind(b"PK\x05\x06", 0, eocd)
+        if eocd < 0:
+            raise ValueError("Not a jar: no ZIP end of central directory record")
+        count, cd_size, cd_offset = struct.unpack_from("<10xHII", tail, eocd)
+        if count == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+            locator = eocd - 20
+            if locator >= 0 and tail[locator:locator + 4] == b"PK\x06\x07":
+                record_offset = struct.unpack_from("<Q", tail, locator + 8)[0]
+                record = self._slice(tail, tail_offset, record_offset, 56)
+                if len(record) < 56 or record[:4] != b"PK\x06\x06":
+                    raise ValueError("Corrupt ZIP64 end of central directory record")
+                count, cd_size, cd_offset = struct.unpack_from("<32xQQQ", record)
+        directory = self._slice(tail, tail_offset, cd_offset, cd_size)
+
+        entries = []
+        pos = 0
+        for _ in range(count):
+            # A truncated jar can cut a record, or the names after it, short
+            if pos + 46 > len(directory) or directory[pos:pos + 4] != b"PK\x01\x02":
+                raise ValueError("Corrupt ZIP central directory")
+            (flags, method, crc, compressed_size, size, name_length, extra_length, comment_length,
+             header_offset) = struct.unpack_from("<8xHH4xIIIHHH8xI", directory, pos)
+            if pos + 46 + name_length + extra_length + comment_length > len(directory):
+                raise ValueError("Corrupt ZIP central directory")
+            name = directory[pos + 46:pos + 46 + name_length].decode("utf-8" if flags & 0x800 else "cp437")
+            if 0xFFFFFFFF in (compressed_size, size, header_offset):
+                extra = directory[pos + 46 + name_length:pos + 46 + name_length + extra_length]
+                size, compressed_size, header_offset = self._zip64_fields(
+                    extra, size, compressed_size, header_offset)
+            entries.append(JarEntry(name, size, compressed_size, method, crc, header_offset))
+            pos += 46 + name_length + extra_length + comment_length
+        return entries
+
+    def _slice(self, tail, tail_offset, offset, length):
+        """length bytes at offset, from the tail already read where possible."""
+        if offset >= tail_offset:
+            return tail[offset - tail_offset:offset - tail_offset + length]
+        head = self._source.read(offset, min(length, tail_offset - offset))
+        return head + tail[:length - len(head)]
+
+    @staticmethod
+    def _zip64_fields(extra, size, compressed_size, header_offset):
+        # The ZIP64 extra field (id 1) holds, in order, only the values that overflowed
+        pos = 0
+        while pos + 4 <= len(extra):
+            block_id, block_size = struct.unpack_from("<HH", extra, pos)
+            if block_id == 1:
+                needed = [size, compressed_size, header_offset].count(0xFFFFFFFF)
+                if pos + 4 + block_size > len(extra) or block_size < needed * 8:
+                    raise ValueError("Corrupt ZIP64 extra field")
+                values = iter(struct.unpack_from(f"<{block_size // 8}Q", extra, pos + 4))
+                size = next(values) if size == 0xFFFFFFFF else size
+                compressed_size = next(values) if compressed_size == 0xFFFFFFFF else compressed_size
+                header_offset = next(values) if header_offset == 0xFFFFFFFF else header_offset
+                break
+            pos += 4 + block_size
+        return size, compressed_size, header_offset
+
+    def read(self, name, max_size=MAX_MEMBER_SIZE):
+        """The uncompressed bytes of one member; raises KeyError if there is none by that name."""
+        entry = self.by_name[name]
+        if entry.size > max_size:
+            raise ValueError(f"{name} is {entry.size} bytes, more than the {max_size} that are read at once")
+        if entry.method not in (0, 8):
+            raise ValueError(f"{name} uses unsupported compression method {entry.method}")
+        with METRICS.span("jar.inspect_read") as span:
+            fetched = self._source.fetched
+            # The local header's extra field can differ from the central one; guess generously, top up if short
+            guess = 30 + len(name.encode("utf-8")) + 256
+            data = self._source.read(entry.header_offset, guess + entry.compressed_size)
+            if len(data) < 30 or data[:4] != b"PK\x03\x04":
+                raise ValueError(f"Corrupt local header for {name}")
+            name_length, extra_length = struct.unpack_from("<HH", data, 26)
+            start = 30 + name_length + extra_length
+            end = start + entry.compressed_size
+            if len(data) < end:
+                data += self._source.read(entry.header_offset + len(data), end - len(data))
+            raw = data[start:end]
+            try:
+                content = zlib.decompress(raw, -15) if entry.method == 8 else raw
+            except zlib.error as e:
+                raise ValueError(f"Corrupt compressed data for {name}: {e}") from None
+            span.bytes = self._source.fetched - fetched
+        if zlib.crc32(content) != entry.crc:
+            raise ChecksumError(f"CRC mismatch for {name}")
+        return content
+
+    def manifest(self):
+        """The main attributes of META-INF/MANIFEST.MF ({} if there is none)."""
+        if "META-INF/MANIFEST.MF" not in self.by_name:
+            return {}
+        attributes = {}
+        key = None
+        for line in self.read("META-INF/MANIFEST.MF").decode("utf-8", "replace").splitlines():
+            if not line:
+                break # The main section ends at the first blank line
+            if line.startswith(" ") and key:
+                attributes[key] += line[1:] # Continuation of a long value
+                continue
+            key, _, value = line.partition(":")
+            attributes[key] = value.strip()
+        return attributes
+
+    def bundled(self, listing):
+        """
+        The rows of a bundler jar's META-INF/<listing>.list ('versions' or 'libraries'),
+        as dicts of sha256, id and path; [] if the jar is not a bundler.
+        """
+        name = f"META-INF/{listing}.list"
+        if name not in self.by_name:
+            return []
+        rows = []
+        for line in self.read(name).decode("utf-8", "replace").splitlines():
+            fields = line.split("\t")
+            if len(fields) == 3:
+                rows.append(dict(zip(("sha256", "id", "path"), fields)))
+        return rows
+
+    def summary(self):
+        """Entry and class counts, the Main-Class and, for bundler jars, what they bundle."""
+        manifest = self.manifest()
+        info = {"entries": len(self.entries), "classes": sum(1 for e in self.entries if e.name.endswith(".class")),
+                "size": self.size, "uncompressed_size": sum(e.size for e in self.entries),
+                "main_class": manifest.get("Main-Class")}
+        if "META-INF/versions.list" in self.by_name:
+            # Since 1.18 the server jar is a bundler: the real server and its libraries are nested jars
+            info["bundled_versions"] = [row["id"] for row in self.bundled("versions")]
+            info["bundled_libraries"] = [row["id"] for row in self.bundled("libraries")]
+            if "META-INF/main-class" in self.by_name:
+                info["bundled_main_class"] = self.read("META-INF/main-class").decode("utf-8", "replace").strip()
+        info["fetched"] = self.fetched
+        return info
+
+def open_jar(jar, jar_store=None, timeout=NETWORK_TIMEOUT):
+    """
+    JarContents for a resolved jar (see resolve_downloads): memory-mapped from the jar
+    store if it is already there, otherwise read remotely with Range requests.
+    """
+    if jar_store is not None and jar.get("sha1"):
+        if jar_store.has(jar["sha1"], jar.get("size")):
+            return JarContents.from_path(jar_store.path_for(jar["sha1"]))
+    return JarContents.from_url(jar["url"], jar.get("size"), timeout)
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections shared between worker threads, so fetching thousands
+    of small files does not pay a TCP and TLS handshake for each one. At most
+    max_per_host requests run against a host at once.
+    """
+    def __init__(self, max_per_host=INSTALL_WORKERS, timeout=NETWORK_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle = {} # (scheme, host, port) -> idle connections
+        self._slots = {} # (scheme, host, port) -> semaphore limiting concurrent requests
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, host, port):
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        with METRICS.span("http.connect"): # DNS, TCP and TLS for a new keep-alive connection
+            conn.connect()
+        return conn
+
+    @contextlib.contextmanager
+    def open(self, url, headers=None):
+        """
+        Sends a GET and yields the response; the body must be read before the block ends.
+        Sources are tried fastest first, as ranked by FETCHER.latency, moving on to the
+        next when one cannot be reached or answers with an error status.
+        """
+        sources = FETCHER.latency.rank(source_urls(url))
+        for i, source in enumerate(sources):
+            last = i == len(sources) - 1
+            parts = urllib.parse.urlsplit(source)
+            key = (parts.scheme, parts.hostname, parts.port)
+            path = parts.path + ("?" + parts.query if parts.query else "")
+            with self._lock:
+                slot = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_per_host))
+            with slot:
+                started = time.perf_counter()
+                try:
+                    conn, resp = self._request(key, path, headers)
+                except (OSError, http.client.HTTPException):
+                    FETCHER.latency.failed(parts.netloc, self.timeout)
+                    if last:
+                        raise
+                    continue
+                if _source_failed(resp.status):
+                    FETCHER.latency.failed(parts.netloc, self.timeout)
+                    if not last:
+                        resp.read()
+                        self._release(key, conn, resp)
+                        continue
+                else:
+                    FETCHER.latency.record(parts.netloc, time.perf_counter() - started)
+                try:
+                    yield resp
+                finally:
+                    self._release(key, conn, resp)
+                return
+
+    def _request(self, key, path, headers):
+        for attempt in range(2):
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                conn = idle.pop() if idle else None
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect(*key)
+            try:
+                conn.request("GET", path, headers=headers or {})
+                return conn, conn.getresponse()
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                if not reused or attempt:
+                    raise
+                # The server closed an idle keep-alive connection; retry on a fresh one
+
+    def _release(self, key, conn, resp):
+        if resp.isclosed() and not resp.will_close:
+            with self._lock:
+                self._idle[key].append(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+def _minecraft_os_name():
+    return {"win32": "windows", "darwin": "osx"}.get(sys.platform, "linux")
+
+def library_allowed(lib):
+    """Evaluates a library's 'rules' for the current OS, the way the launcher does."""
+    rules = lib.get("rules")
+    if not rules:
+        return True
+    allowed = False
+    for rule in rules:
+        os_rule = rule.get("os", {})
+        if rule.get("features") or (os_rule.get("name") and os_rule["name"] != _minecraft_os_name()):
+            continue
+        if os_rule.get("arch") == "x86" and platform.architecture()[0] != "32bit":
+            continue
+        allowed = rule.get("action") == "allow"
+    return allowed
+
+def library_downloads(vjson):
+    """Returns the library files a version needs on this OS as (url, relative path, sha1, size)."""
+    files = {}
+    arch = "64" if platform.architecture()[0] == "64bit" else "32"
+    for lib in vjson.get("libraries", []):
+        if not library_allowed(lib):
+            continue
+        downloads = lib.get("downloads", {})
+        artifacts = [downloads.get("artifact")]
+        # Older versions list natives as classifiers selected by OS
+        classifier = lib.get("natives", {}).get(_minecraft_os_name())
+        if classifier:
+            artifacts.append(downloads.get("classifiers", {}).get(classifier.replace("${arch}", arch)))
+        for artifact in artifacts:
+            if artifact and artifact.get("url") and artifact.get("path"):
+                files[artifact["path"]] = (artifact["url"], artifact["path"], artifact.get("sha1"), artifact.get("size"))
+    return list(files.values())
+
+class InstallStats:
+    """Thread-safe counters for an install, with files/sec and MB/sec since start."""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.total = self.done = self.skipped = self.failed = self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, amount in counts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            fetched = self.done - self.skipped
+            return {"total": self.total, "done": self.done, "skipped": self.skipped,
+                    "failed": self.failed, "bytes": self.bytes, "seconds": round(elapsed, 3),
+                    "files_per_sec": round(fetched / elapsed, 1),
+                    "mb_per_sec": round(self.bytes / elapsed / (1024 * 1024), 2)}
+
+class ClientInstaller:
+    """
+    Installs a runnable client into a launcher-style directory: versions/<id>/ with the
+    version JSON and client jar, libraries/, and assets/indexes + assets/objects/.
+    Libraries and asset objects are fetched by a pool of workers over keep-alive
+    connections; files already present are skipped (asset objects by their hash-named
+    path and size, libraries by SHA1) and every download is checked against its SHA1.
+    Setting the cancel event makes the workers skip the remaining files, and install()
+    then raises DownloadCancelled.
+    """
+    def __init__(self, directory, jar_store, workers=INSTALL_WORKERS, pool=None, cancel=None):
+        self.directory = directory
+        self.jar_store = jar_store
+        self.workers = workers
+        self.pool = pool or ConnectionPool(max_per_host=workers)
+        self.cancel = cancel if cancel is not None else threading.Event()
+
+    def install(self, v, vjson, progress=None):
+        """Installs version v (manifest entry + parsed JSON). progress(stats dict) is called as files finish."""
+        stats = InstallStats()
+        version_dir = os.path.join(self.directory, "versions", v["id"])
+        _atomic_write(os.path.join(version_dir, v["id"] + ".json"), json.dumps(vjson).encode("utf-8"))
+
+        jobs = [(url, os.path.join(self.directory, "libraries", path), sha1, size, True)
+                for url, path, sha1, size in library_downloads(vjson)]
+        asset_index = vjson.get("assetIndex")
+        if asset_index:
+            index_path = os.path.join(self.directory, "assets", "indexes", asset_index["id"] + ".json")
+            self._fetch(asset_index["url"], index_path, asset_index.get("sha1"), asset_index.get("size"), True)
+            with open(index_path, "rb") as f:
+                objects = json.load(f).get("objects", {})
+            seen = set()
+            for obj in objects.values():
+                h = obj["hash"]
+                if h in seen:
+                    continue # Several asset names can share one object
+                seen.add(h)
+                jobs.append((f"{RESOURCES_URL}/{h[:2]}/{h}",
+                             os.path.join(self.directory, "assets", "objects", h[:2], h), h, obj.get("size"), False))
+        stats.add(total=len(jobs) + 1)
+
+        def run(job):
+            if self.cancel.is_set():
+                return
+            url, path, sha1, size, check_existing_hash = job
             try:
-                resp = urllib.request.urlopen(v["url"])
-                vjson = json.load(resp)
-                downloads = vjson.get('downloads', {})
-                client_url = downloads.get('client', {}).get('url')
-                server_url = downloads.get('server', {}).get('url')
-                mojang_details_loaded = True
+                fetched = self._fetch(url, path, sha1, size, check_existing_hash)
+                stats.add(done=1, skipped=0 if fetched else 1, bytes=fetched)
             except Exception as e:
-                # Only show a warning if Mojang details failed to load AND it was expected to have them
-                message_prefix = f"Warning: Could not load full Mojang details for {v['id']}:\n{e}\nChecking fallback lists...\n\n"
-        # else: Removed: "Displaying custom client details for [VERSION]"
-            # This is likely a custom client version without a Mojang URL, no special prefix needed now.
-
-
-        # --- EXISTING FALLBACK LOGIC for Server URL ---
-        if not server_url and v["id"] in self.missing_versions_map:
-            server_url = self.missing_versions_map[v["id"]]
-
-        # --- Use client_url from custom_client_versions if available and not already set by Mojang ---
-        # Find this version in our custom_client_versions list to get its specific client_url
-        custom_v_details = next((item for item in self.custom_client_versions if item["id"] == v["id"]), None)
-        if custom_v_details and "client_url" in custom_v_details and not client_url:
-            client_url = custom_v_details["client_url"]
-
-        lines = [
-            f"ID: {v.get('id', 'N/A')}",
-            f"Type: {v.get('type', 'Unknown Type')}", # Default type changed
-            f"Release Time: {v.get('releaseTime', 'N/A')}" # Default time for custom clients
-        ]
-
-        # Add details from Mojang's vjson if it was successfully loaded
-        if mojang_details_loaded:
-            if 'mainClass' in vjson:
-                lines.append(f"Main Class: {vjson['mainClass']}")
-            if 'complianceLevel' in vjson:
-                lines.append(f"Compliance Level: {vjson['complianceLevel']}")
-
-        # Report client jar info if available
-        if client_url:
-            # Determine source of client URL
-            client_source = "Mojang Servers"
-            if custom_v_details and client_url == custom_v_details.get('client_url'):
-                client_source = "Not from Mojang's Servers" # Changed from "Custom Client List"
-            elif not mojang_details_loaded: # If Mojang details weren't loaded but a URL was found (e.g., from fallback not handled above)
-                client_source = "Unknown Source (Not Mojang)"
-
-
-            # If client URL came from Mojang's downloads, get its size
-            if mojang_details_loaded and client_url == vjson.get('downloads', {}).get('client', {}).get('url'):
-                 client_size = vjson.get('downloads', {}).get('client', {}).get('size', 'n/a')
-                 lines.append(f"Client Jar Size: {client_size} bytes (Source: {client_source})")
+                _warn(f"Could not install {url}: {e}")
+                stats.add(failed=1)
+            if progress:
+                progress(stats.snapshot())
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="install") as pool:
+            client = vjson.get("downloads", {}).get("client")
+            client_future = None
+            if client:
+                client_future = pool.submit(self.jar_store.fetch, client["url"],
+                                            os.path.join(version_dir, v["id"] + ".jar"), client["sha1"], client.get("size"))
+            list(pool.map(run, jobs))
+            if client_future is not None:
+                try:
+                    from_store = client_future.result()
+                    stats.add(done=1, skipped=1 if from_store else 0, bytes=0 if from_store else client.get("size") or 0)
+                except Exception as e:
+                    _warn(f"Could not install client jar: {e}")
+                    stats.add(failed=1)
             else:
-                 lines.append(f"Client Jar: Available (Source: {client_source})")
+                stats.add(done=1, skipped=1) # Nothing to fetch for the client jar
+        self.pool.close()
+        if self.cancel.is_set():
+            raise DownloadCancelled("Install cancelled")
+        result = stats.snapshot()
+        if progress:
+            progress(result)
+        return result
+
+    def _fetch(self, url, path, sha1, size, check_existing_hash):
+        """Downloads url to path unless it is already there; returns the bytes fetched."""
+        with METRICS.span("install.file") as span:
+            if self._present(path, sha1, size, check_existing_hash):
+                span.cache = "hit"
+                return 0
+            span.cache = "miss"
+            for attempt in range(FETCHER.retries + 1):
+                try:
+                    span.bytes = self._download(url, path, sha1, size, span)
+                    return span.bytes
+                except (OSError, http.client.HTTPException) as e:
+                    if attempt == FETCHER.retries or (isinstance(e, urllib.error.HTTPError) and not _retryable(e)):
+                        raise
+                    METRICS.cache("fetch", "retry")
+                    if self.cancel.wait(FETCHER.backoff * 2 ** attempt):
+                        raise DownloadCancelled("Install cancelled")
+
+    def _download(self, url, path, sha1, size, span):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part_path = f"{path}.{threading.get_ident()}.part"
+        hasher = hashlib.sha1()
+        fetched = 0
+        try:
+            with self.pool.open(url) as resp, open(part_path, "wb") as f:
+                span.mark("first_byte")
+                if resp.status != 200:
+                    resp.read()
+                    raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+                while True:
+                    block = resp.read(DOWNLOAD_BLOCK_SIZE)
+                    if not block:
+                        break
+                    f.write(block)
+                    hasher.update(block)
+                    fetched += len(block)
+            if sha1 and hasher.hexdigest() != sha1.lower():
+                raise ChecksumError(f"SHA1 mismatch: expected {sha1}, got {hasher.hexdigest()}")
+            if size is not None and fetched != size:
+                raise ChecksumError(f"Size mismatch: expected {size}, got {fetched}")
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        return fetched
 
-        # Report server jar info if available (can be from Mojang or fallback)
-        if server_url:
-            server_source = "Mojang Servers"
-            if v["id"] in self.missing_versions_map and server_url == self.missing_versions_map[v["id"]]:
-                server_source = "Not from Mojang's Servers (Fallback)" # Changed similar to client
-            elif not mojang_details_loaded:
-                server_source = "Unknown Source (Not Mojang)"
+    @staticmethod
+    def _present(path, sha1, size, check_hash):
+        try:
+            if size is not None and os.path.getsize(path) != size:
+                return False
+            if not check_hash or not sha1:
+                return os.path.exists(path)
+            with open(path, "rb") as f:
+                return hashlib.sha1(f.read()).hexdigest() == sha1.lower()
+        except OSError:
+            return False
+
+# Result of merge_versions: the ordered list plus what could not be placed.
+# dangling is a list of (id, above) pairs whose 'above' target does not exist, cycles is a
+# list of id lists that point 'above' each other, and duplicates lists repeated custom ids.
+MergeResult = collections.namedtuple("MergeResult", "versions dangling cycles duplicates")
+
+def merge_versions(mojang_versions, custom_versions):
+    """
+    Merges Mojang versions with custom client versions in O(n + m).
+
+    Custom versions with an 'above' target are placed directly before that target (after
+    any custom versions placed there earlier), custom versions without one go to the top,
+    and custom versions whose target is missing or part of a cycle go to the bottom.
+    The order is the same as the original iterative merge, which placed entries in rounds,
+    so it is reproduced here by computing each entry's round from its 'above' chain.
+    Custom entries that reuse a Mojang id are dropped; repeated custom ids keep the first.
+    """
+    mojang_ids = {v["id"] for v in mojang_versions}
+
+    customs = [] # Custom versions that need placing, in list order
+    custom_index = {} # id -> index into customs
+    duplicates = []
+    for v in custom_versions:
+        custom_id = v["id"]
+        if custom_id in mojang_ids:
+            continue
+        if custom_id in custom_index:
+            duplicates.append(custom_id)
+            continue
+        custom_index[custom_id] = len(customs)
+        customs.append(v)
+
+    # The round in which each custom version would be placed: 1 if its target is a Mojang
+    # version (or it has none), otherwise its target's round, plus one if the target comes
+    # later in the list. 0 marks an entry that can never be placed.
+    rounds = [0] * len(customs)
+    visited = bytearray(len(customs)) # 0 = new, 1 = on the current chain, 2 = done
+    dangling = []
+    cycles = []
+    for start in range(len(customs)):
+        if visited[start]:
+            continue
+        chain = []
+        i = start
+        while True:
+            visited[i] = 1
+            chain.append(i)
+            above_id = customs[i].get("above")
+            if not above_id or above_id in mojang_ids:
+                last_round = 1
+                break
+            j = custom_index.get(above_id)
+            if j is None:
+                dangling.append((customs[i]["id"], above_id))
+                last_round = 0
+                break
+            if visited[j] == 1:
+                cycles.append([customs[k]["id"] for k in chain[chain.index(j):]])
+                last_round = 0
+                break
+            if visited[j] == 2:
+                last_round = rounds[j] and rounds[j] + (i < j)
+                break
+            i = j
+        rounds[chain[-1]] = last_round
+        visited[chain[-1]] = 2
+        for k in range(len(chain) - 2, -1, -1):
+            i, j = chain[k], chain[k + 1]
+            rounds[i] = rounds[j] and rounds[j] + (i < j)
+            visited[i] = 2
+
+    # Bucket by round so every target sees its custom versions in placement order
+    buckets = [[] for _ in range(max(rounds, default=0) + 1)]
+    for i, r in enumerate(rounds):
+        if r:
+            buckets[r].append(i)
+    top_level = []
+    placed_before = {} # target id -> custom indices placed directly before it, in order
+    for bucket in buckets[1:]:
+        for i in bucket:
+            above_id = customs[i].get("above")
+            if above_id:
+                placed_before.setdefault(above_id, []).append(i)
+            else:
+                top_level.append(i)
+
+    ordered = []
+    def emit(root):
+        # Iterative post-order walk: everything placed before a version, then the version
+        stack = [(root, False)]
+        while stack:
+            v, expanded = stack.pop()
+            if expanded:
+                ordered.append(v)
+                continue
+            stack.append((v, True))
+            for i in reversed(placed_before.pop(v["id"], ())):
+                stack.append((customs[i], False))
+
+    # Versions without a target were each inserted at index 0, so the last one ends up first
+    for i in reversed(top_level):
+        emit(customs[i])
+    for v in mojang_versions:
+        emit(v)
+    ordered.extend(customs[i] for i, r in enumerate(rounds) if not r)
+    return MergeResult(ordered, dangling, cycles, duplicates)
+
+def merge_and_sort_versions(mojang_versions, custom_versions):
+    """
+    Merges Mojang and custom client versions (see merge_versions), reporting problems in the
+    custom list as warnings. The affected entries end up at the bottom of the list.
+    """
+    result = merge_versions(mojang_versions, custom_versions)
+    for custom_id, above_id in result.dangling:
+        _warn(f"Custom version {custom_id} is placed above unknown version {above_id}")
+    for cycle in result.cycles:
+        _warn(f"Custom versions form an 'above' cycle: {' -> '.join(cycle)}")
+    for custom_id in result.duplicates:
+        _warn(f"Duplicate custom version {custom_id} ignored")
+    return result.versions
+
+def parse_release_time(text):
+    """Parses a manifest releaseTime into a POSIX timestamp, or None if it is missing or malformed."""
+    if not text:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+class VersionRecord:
+    """
+    One catalog entry. Only the manifest fields the tool uses are kept, in slots, with
+    the release time parsed and the fallback sources resolved up front:
+    server_url is the fallback server jar and client_url the custom client jar, if any.
+    Records also answer v["id"], v.get("type") and "url" in v with the manifest's JSON
+    keys, so code written against raw manifest entries works unchanged.
+
+    To stay compact the SHA1 is kept as 20 raw bytes, type strings are interned, and a
+    url that follows piston-meta's usual packages/<sha1>/<id>.json layout is rebuilt on
+    demand instead of being stored. Links on a mirror are kept as their upstream URL
+    (see upstream_url), so a record does not change with the source its manifest came from.
+    """
+    __slots__ = ("id", "type", "release_time", "released", "_url", "_sha1", "above",
+                 "server_url", "client_url")
+    _KEYS = {"id": "id", "type": "type", "releaseTime": "release_time", "url": "url", "sha1": "sha1",
+             "above": "above", "server_url": "server_url", "client_url": "client_url"}
+
+    def __init__(self, entry, server_url=None, client_url=None):
+        self.id = entry["id"]
+        self.type = sys.intern(entry["type"]) if entry.get("type") else None
+        self.release_time = entry.get("releaseTime")
+        self.released = parse_release_time(self.release_time)
+        sha1 = entry.get("sha1")
+        try:
+            self._sha1 = bytes.fromhex(sha1) if sha1 else None
+        except ValueError:
+            self._sha1 = sha1 # Not hex; keep it as given
+        self._url = None
+        url = upstream_url(entry.get("url"))
+        if url is not None and url != self._packaged_url():
+            self._url = url
+        elif url is None:
+            self._url = False # No URL at all (custom clients), as opposed to a rebuildable one
+        self.above = entry.get("above")
+        self.server_url = upstream_url(server_url)
+        self.client_url = upstream_url(client_url)
+
+    @classmethod
+    def _from_row(cls, row):
+        """Rebuilds a record from a CatalogSnapshot row without reparsing anything."""
+        record = cls.__new__(cls)
+        (record.id, record.type, record.release_time, record.released, url, record._sha1,
+         record.above, record.server_url, record.client_url) = row
+        record._url = False if url == "" else url
+        if record.type is not None:
+            record.type = sys.intern(record.type)
+        return record
+
+    def _to_row(self):
+        return (self.id, self.type, self.release_time, self.released, "" if self._url is False else self._url,
+                self._sha1, self.above, self.server_url, self.client_url)
+
+    def _packaged_url(self):
+        sha1 = self.sha1
+        return f"{PISTON_META_PACKAGES_URL}/{sha1}/{self.id}.json" if sha1 else None
+
+    @property
+    def sha1(self):
+        return self._sha1.hex() if isinstance(self._sha1, bytes) else self._sha1
+
+    @property
+    def url(self):
+        if self._url is None:
+            return self._packaged_url()
+        return self._url or None
+
+    @property
+    def source(self):
+        return "mojang" if self.url else "custom"
+
+    def get(self, key, default=None):
+        attr = self._KEYS.get(key) # "url" and "sha1" map to the properties above
+        value = getattr(self, attr) if attr else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def to_dict(self):
+        """The record as a manifest-style dict (only the fields that are set)."""
+        return {key: getattr(self, attr) for key, attr in self._KEYS.items() if getattr(self, attr) is not None}
+
+    def matches(self, entry, server_url=None, client_url=None):
+        """True if this record is what VersionRecord(entry, server_url, client_url) would build."""
+        return (self.sha1 == entry.get("sha1") and self.url == upstream_url(entry.get("url"))
+                and self.type == (entry.get("type") or None) and self.release_time == entry.get("releaseTime")
+                and self.above == entry.get("above") and self.server_url == upstream_url(server_url)
+                and self.client_url == upstream_url(client_url))
+
+    def __repr__(self):
+        return f"VersionRecord({self.id!r})"
+
+# What changed between two catalogs, as lists of version ids in the newer catalog's order
+# (removed in the older one's).
+CatalogDelta = collections.namedtuple("CatalogDelta", "added changed removed")
+
+class VersionCatalog:
+    """
+    The merged version list as VersionRecords in display order, with indexes for the
+    lookups the detail, search and download paths need: id -> record, type -> ids and
+    release time order (for O(log n) range queries).
+    """
+    def __init__(self, records):
+        self.versions = records
+        self.by_id = {}
+        self.by_type = {}
+        for record in records:
+            if record.id in self.by_id:
+                continue
+            self.by_id[record.id] = record
+            self.by_type.setdefault(record.get("type", "Custom Client").lower(), []).append(record.id)
+        timed = sorted((r for r in records if r.released is not None), key=lambda r: r.released)
+        self._release_order = timed
+        self._release_keys = [r.released for r in timed]
+
+    @classmethod
+    def from_manifests(cls, mojang_versions, missing_servers, custom_clients, previous=None):
+        """
+        Merges the raw manifest lists (see merge_and_sort_versions) into a catalog. Given the
+        previous catalog, only entries that are new or changed get new records; the merge
+        then runs over those plus the previous records, which behave like manifest entries.
+        """
+        server_urls = {entry["id"]: entry["server_url"] for entry in missing_servers}
+        client_urls = {entry["id"]: entry["client_url"] for entry in custom_clients if entry.get("client_url")}
+        if previous is None:
+            with METRICS.span("catalog.merge"):
+                merged = merge_and_sort_versions(mojang_versions, custom_clients)
+            with METRICS.span("catalog.build"):
+                return cls([VersionRecord(v, server_urls.get(v["id"]), client_urls.get(v["id"])) for v in merged])
+
+        def record(entry):
+            server_url, client_url = server_urls.get(entry["id"]), client_urls.get(entry["id"])
+            old = previous.get(entry["id"])
+            if old is not None and old.matches(entry, server_url, client_url):
+                return old
+            return VersionRecord(entry, server_url, client_url)
+        with METRICS.span("catalog.build"):
+            mojang_records = [record(entry) for entry in mojang_versions]
+            custom_records = [record(entry) for entry in custom_clients]
+        with METRICS.span("catalog.merge"):
+            return cls(merge_and_sort_versions(mojang_records, custom_records))
+
+    def diff(self, newer):
+        """The CatalogDelta from this catalog to newer, comparing versions by id and content."""
+        added, changed = [], []
+        for record in newer.by_id.values():
+            old = self.by_id.get(record.id)
+            if old is None:
+                added.append(record.id)
+            elif old is not record and old._to_row() != record._to_row():
+                changed.append(record.id)
+        removed = [version_id for version_id in self.by_id if version_id not in newer.by_id]
+        return CatalogDelta(added, changed, removed)
+
+    def __len__(self):
+        return len(self.versions)
+
+    def __iter__(self):
+        return iter(self.versions)
+
+    def get(self, version_id):
+        return self.by_id.get(version_id)
+
+    def ids_of_type(self, version_type):
+        return self.by_type.get(version_type.lower(), [])
+
+    def released_between(self, start=None, end=None):
+        """Records released at or after start and before end (timestamps), oldest first."""
+        lo = 0 if start is None else bisect.bisect_left(self._release_keys, start)
+        hi = len(self._release_keys) if end is None else bisect.bisect_left(self._release_keys, end)
+        return self._release_order[lo:hi]
+
+    def server_fallback_ids(self):
+        return [r.id for r in self.by_id.values() if r.server_url]
+
+def build_catalog(docs, previous=None):
+    """
+    Builds the VersionCatalog from a dict of the three startup manifests (a missing document
+    counts as empty), reusing unchanged records from the previous catalog if one is given.
+    """
+    return VersionCatalog.from_manifests(
+        (docs.get(MANIFEST_URL) or {}).get("versions", []),
+        (docs.get(MISSING_SERVERS_URL) or {}).get("versions", []),
+        (docs.get(MISSING_CLIENTS_URL) or {}).get("versions", []),
+        previous)
+
+class CatalogSnapshot:
+    """
+    The merged catalog saved as a small SQLite file after each successful load, so the next
+    launch can show the list straight from it instead of parsing and merging the three
+    manifests again. A snapshot is tagged with the ManifestLoader.signature() of the
+    manifests it was built from and is only used while that still matches.
+    """
+    FORMAT = 1
+    _COLUMNS = "id, type, release_time, released, url, sha1, above, server_url, client_url"
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "catalog.sqlite")
+
+    def load(self, signature=None):
+        """Returns the saved VersionCatalog, or None if there is none or it does not match signature."""
+        with METRICS.span("catalog.snapshot_load") as span:
+            catalog = self._load(signature)
+            span.cache = "miss" if catalog is None else "hit"
+        return catalog
+
+    def _load(self, signature):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            db = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True)
+        except sqlite3.Error:
+            return None
+        try:
+            db.execute("PRAGMA mmap_size = 67108864") # Read the pages straight from the mapped file
+            meta = dict(db.execute("SELECT key, value FROM meta"))
+            if meta.get("format") != str(self.FORMAT) or (signature is not None and meta.get("signature") != signature):
+                return None
+            rows = db.execute(f"SELECT {self._COLUMNS} FROM versions ORDER BY position").fetchall()
+        except sqlite3.Error as e:
+            _warn(f"Ignoring unreadable catalog snapshot {self.path}: {e}")
+            return None
+        finally:
+            db.close()
+        return VersionCatalog([VersionRecord._from_row(row) for row in rows])
 
+    def save(self, catalog, signature):
+        """Replaces the snapshot with catalog; failures only cost the fast start next time."""
+        with METRICS.span("catalog.snapshot_save"):
+            self._save(catalog, signature)
 
-            if mojang_details_loaded and server_url == vjson.get('downloads', {}).get('server', {}).get('url'):
-                 server_size = vjson.get('downloads', {}).get('server', {}).get('size', 'n/a')
-                 lines.append(f"Server Jar Size: {server_size} bytes (Source: {server_source})")
+    def _save(self, catalog, signature):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            db = sqlite3.connect(tmp_path)
+            try:
+                db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                db.execute(f"CREATE TABLE versions (position INTEGER PRIMARY KEY, {self._COLUMNS})")
+                db.executemany("INSERT INTO meta VALUES (?, ?)",
+                               [("format", str(self.FORMAT)), ("signature", signature)])
+                db.executemany("INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               ((i,) + record._to_row() for i, record in enumerate(catalog.versions)))
+                db.commit()
+            finally:
+                db.close()
+            os.replace(tmp_path, self.path)
+        except (OSError, sqlite3.Error) as e:
+            _warn(f"Could not write catalog snapshot {self.path}: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+def fetch_catalog(manifest_loader=None, snapshot=None):
+    """
+    Revalidates the startup manifests and returns (catalog, results). When none of them
+    changed the catalog comes from the snapshot instead of being rebuilt; a catalog built
+    from a complete set of manifests is saved as the new snapshot.
+    """
+    manifest_loader = manifest_loader or ManifestLoader()
+    snapshot = snapshot or CatalogSnapshot()
+    results = manifest_loader.fetch_all(STARTUP_MANIFEST_URLS)
+    complete = not any(r.status == "failed" for r in results.values())
+    signature = manifest_loader.signature(STARTUP_MANIFEST_URLS) if complete else None
+    catalog = None
+    if signature and not any(r.status == "fresh" for r in results.values()):
+        catalog = snapshot.load(signature)
+    if catalog is None:
+        catalog = build_catalog({url: r.data for url, r in results.items()})
+        if signature:
+            snapshot.save(catalog, signature)
+    return catalog, results
+
+class ManifestWatcher:
+    """
+    Keeps a catalog current by polling the startup manifests with conditional requests.
+    poll() costs three 304s when nothing changed. Otherwise it rebuilds the catalog from
+    the new manifests, reusing the records of unchanged versions, and returns the
+    CatalogDelta, so callers only touch what was added or changed.
+    """
+    def __init__(self, catalog, manifest_loader=None, snapshot=None):
+        self.catalog = catalog
+        self.manifest_loader = manifest_loader or ManifestLoader()
+        self.snapshot = snapshot # Saved after every change, if given
+        # The loader caches a fresh manifest as soon as it arrives, so a poll that cannot apply
+        # one remembers it: later polls see a 304 for it, but must still rebuild
+        self._unapplied = False
+
+    def poll(self):
+        """Returns the CatalogDelta since the last poll, or None if nothing changed."""
+        results = self.manifest_loader.fetch_all(STARTUP_MANIFEST_URLS)
+        if any(r.status == "fresh" for r in results.values()):
+            self._unapplied = True
+        if not self._unapplied:
+            return None
+        if any(r.status == "failed" for r in results.values()):
+            return None # A missing list would look like every version in it was removed
+        self._unapplied = False
+        catalog = build_catalog({url: r.data for url, r in results.items()}, previous=self.catalog)
+        delta = self.catalog.diff(catalog)
+        self.catalog = catalog
+        if self.snapshot is not None:
+            self.snapshot.save(catalog, self.manifest_loader.signature(STARTUP_MANIFEST_URLS))
+        return delta if any(delta) else None
+
+    def run(self, callback, stop_event, interval=WATCH_INTERVAL):
+        """Polls now and then every interval seconds until stop_event is set; callback(catalog, delta) on changes."""
+        while not stop_event.is_set():
+            try:
+                delta = self.poll()
+            except Exception as e:
+                _warn(f"Watch poll failed: {e}")
+                delta = None
+            if delta is not None:
+                callback(self.catalog, delta)
+            stop_event.wait(interval)
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class VersionSearchIndex:
+    """
+    Precomputed search index over the merged version list, built once per catalog load.
+
+    Free text is matched as a substring of the version id or type (every word must match),
+    using a trigram index to find candidates instead of scanning every version. A query
+    that only extends the previous one narrows the previous results. Structured filters
+    are answered from per-field indexes:
+
+        type:<type>            type as shown in the list, e.g. type:release, type:custom_client
+        source:mojang|custom   where the version entry comes from
+        server:yes|no|unknown  a server jar is known (fallback list or already-loaded details),
+                               known not to exist, or not known until the version's details load
+        after:<time>           releaseTime at or after an ISO prefix, e.g. after:2019-06
+        before:<time>          releaseTime before an ISO prefix, e.g. before:2012
+    """
+    FILTER_KEYS = ("type", "source", "server", "after", "before")
+
+    def __init__(self, versions, server_ids=()):
+        self.versions = versions
+        with METRICS.span("search.index"):
+            self.keys = [(v["id"].lower(), v.get("type", "").lower()) for v in versions]
+            self.positions = {} # id -> position of its first occurrence
+            self.trigrams = {} # trigram -> ascending positions whose id or type contains it
+            self.by_type = {}
+            self.by_source = {"mojang": [], "custom": []}
+            times = []
+            for pos, v in enumerate(versions):
+                self.positions.setdefault(v["id"], pos)
+                vid, vtype = self.keys[pos]
+                for gram in _trigrams(vid) | _trigrams(vtype):
+                    self.trigrams.setdefault(gram, []).append(pos)
+                # Filter on the type as the list shows it, so custom clients are "custom client"
+                self.by_type.setdefault(v.get("type", "Custom Client").lower(), []).append(pos)
+                self.by_source["mojang" if "url" in v else "custom"].append(pos)
+                if v.get("releaseTime"):
+                    times.append((v["releaseTime"], pos))
+            times.sort()
+            self.release_times = [t for t, _ in times]
+            self.release_positions = [pos for _, pos in times]
+            self.server_positions = {self.positions[i] for i in server_ids if i in self.positions}
+            self.no_server_positions = set() # Mojang versions whose loaded details list no server jar
+        self._last_query = None # (terms, filters, result positions) of the previous search
+
+    def mark_has_server(self, version_id):
+        """Records that a server jar is known for version_id (e.g. once its details are loaded)."""
+        if version_id in self.positions:
+            self.server_positions.add(self.positions[version_id])
+            self._last_query = None
+
+    def mark_no_server(self, version_id):
+        """Records that version_id's loaded details list no server jar (a fallback one may still exist)."""
+        if version_id in self.positions:
+            self.no_server_positions.add(self.positions[version_id])
+            self._last_query = None
+
+    @classmethod
+    def parse(cls, query):
+        """Splits a query into lowercased free-text terms and a dict of filters."""
+        terms, filters = [], {}
+        for token in query.lower().split():
+            key, sep, value = token.partition(":")
+            if sep and value and key in cls.FILTER_KEYS:
+                filters[key] = value
             else:
-                 lines.append(f"Server Jar: Available (Source: {server_source})")
-
-
-        # prepare technical info ONLY from Mojang's vjson, as fallback only provides URL
-        if mojang_details_loaded:
-            ai = vjson.get('assetIndex', {})
-            if ai:
-                tech_info.append(f"AssetIndex URL: {ai.get('url')}")
-                tech_info.append(f"AssetIndex SHA1: {ai.get('sha1')}")
-            for part in ('client','server'):
-                info = vjson.get('downloads', {}).get(part, {})
-                if info and info.get('url'): # Check if URL exists in Mojang data
-                    tech_info.append(f"{part.capitalize()} URL: {info.get('url')}")
-                    tech_info.append(f"{part.capitalize()} SHA1: {info.get('sha1')}")
-            tech_info.append(f"Libraries Count: {len(vjson.get('libraries', []))}")
-
-        # Add custom client's URL to tech info if it exists
-        if custom_v_details and "client_url" in custom_v_details:
-             tech_info.append(f"Client URL (Not from Mojang): {custom_v_details['client_url']}") # Renamed for tech info
-
-        # Schedule the UI update on the main thread using self.after()
-        self.after(0, self._update_ui_after_details_load,
-                   message_prefix + "\n".join(lines), client_url, server_url, tech_info)
-
-    def _update_ui_after_details_load(self, details_text, client_url, server_url, tech_info):
+                terms.append(token)
+        return terms, filters
+
+    def search(self, query):
+        """Returns the matching versions in catalog order."""
+        with METRICS.span("search.query"):
+            return self._search(query)
+
+    def _search(self, query):
+        terms, filters = self.parse(query)
+        if not terms and not filters:
+            return self.versions
+
+        postings = sorted((self.trigrams.get(g, []) for t in terms if len(t) >= 3 for g in _trigrams(t)), key=len)
+        last = self._last_query
+        if (last and last[1] == filters and all(any(t in u for u in terms) for t in last[0])
+                and (not postings or len(last[2]) <= len(postings[0]))):
+            # Every previous word is contained in a new one, so only previous matches can match
+            candidates = last[2]
+        else:
+            candidates = self._filter_positions(filters) if filters else None
+            if postings:
+                matched = set(postings[0]).intersection(*postings[1:])
+                candidates = sorted(matched) if candidates is None else [p for p in candidates if p in matched]
+            elif candidates is None:
+                candidates = range(len(self.versions))
+
+        keys = self.keys
+        result = [p for p in candidates if all(t in keys[p][0] or t in keys[p][1] for t in terms)]
+        self._last_query = (terms, filters, result)
+        return [self.versions[p] for p in result]
+
+    def _filter_positions(self, filters):
+        """Ascending positions that pass every structured filter."""
+        sets = []
+        for key, value in filters.items():
+            if key == "type":
+                sets.append(self.by_type.get(value.replace("_", " "), []))
+            elif key == "source":
+                sets.append(self.by_source.get(value, []))
+            elif key == "server":
+                if value in ("yes", "true", "1"):
+                    sets.append(self.server_positions)
+                elif value in ("unknown", "?"):
+                    # Mojang versions only tell once their details are loaded
+                    sets.append([p for p in self.by_source["mojang"]
+                                 if p not in self.server_positions and p not in self.no_server_positions])
+                else:
+                    known = sorted(set(self.by_source["custom"]) | self.no_server_positions)
+                    sets.append([p for p in known if p not in self.server_positions])
+            elif key == "after":
+                sets.append(self.release_positions[bisect.bisect_left(self.release_times, value.upper()):])
+            elif key == "before":
+                sets.append(self.release_positions[:bisect.bisect_left(self.release_times, value.upper())])
+        sets.sort(key=len)
+        others = [s if isinstance(s, set) else set(s) for s in sets[1:]]
+        return sorted(p for p in sets[0] if all(p in s for s in others))
+
+def _content_sha1(url):
+    """The SHA1 that a content-addressed Mojang URL (packages/<sha1>/..., objects/<sha1>/...) names, if any."""
+    match = re.search(r"/([0-9a-f]{40})(?:/|$)", urllib.parse.urlsplit(url).path)
+    return match.group(1) if match else None
+
+class _MirrorTransfer:
+    """An upstream download in progress on the mirror, which any number of clients stream from."""
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.started = False # Upstream answered and the file is open
+        self.size = None # Content-Length from upstream, if it sent one
+        self.written = 0
+        self.done = False
+        self.error = None
+
+class MirrorCache:
+    """
+    The storage side of the LAN mirror (see run_mirror). The startup manifests are
+    revalidated upstream at most every manifest_ttl seconds. Everything else (version
+    JSONs, jars, libraries, assets) never changes, so it is kept on disk after the first
+    request. While a file is still arriving from upstream, every client that asks for it
+    streams from that one download. Only known download hosts are proxied, plus any host
+    the fallback lists link to.
+    """
+    def __init__(self, cache_dir=None, manifest_ttl=MIRROR_MANIFEST_TTL, allow_hosts=(), timeout=NETWORK_TIMEOUT):
+        self.cache_dir = os.path.join(cache_dir or CACHE_DIR, "mirror")
+        self.manifest_loader = ManifestLoader(self.cache_dir, timeout)
+        self.manifest_ttl = manifest_ttl
+        self.timeout = timeout
+        self.allowed_hosts = set(MIRROR_HOSTS) | set(allow_hosts)
+        self.allowed_hosts.update(urllib.parse.urlsplit(url).netloc for url in STARTUP_MANIFEST_URLS)
+        self._manifests = {} # url -> (time.monotonic() when fetched, parsed document)
+        self._manifest_locks = {} # url -> lock held while that manifest is revalidated
+        self._transfers = {} # url -> _MirrorTransfer still receiving from upstream
+        self._fallback_hosts_loaded = False
+        self._lock = threading.Lock()
+
+    def manifest(self, url):
+        """Returns the parsed manifest at url; concurrent callers share one revalidation."""
+        with self._lock:
+            lock = self._manifest_locks.setdefault(url, threading.Lock())
+        with lock:
+            cached = self._manifests.get(url)
+            if cached and time.monotonic() - cached[0] < self.manifest_ttl:
+                return cached[1]
+            result = self.manifest_loader.fetch(url)
+            if result.data is None:
+                raise IOError(f"Could not fetch {url}: {result.error}")
+            if url in (MISSING_SERVERS_URL, MISSING_CLIENTS_URL):
+                for entry in result.data.get("versions", []):
+                    for key in ("server_url", "client_url"):
+                        if entry.get(key):
+                            self.allowed_hosts.add(urllib.parse.urlsplit(entry[key]).netloc)
+            self._manifests[url] = (time.monotonic(), result.data)
+            return result.data
+
+    def rewritten_manifest(self, url, base_url):
+        """The manifest at url as JSON bytes, with every download link pointing at the mirror at base_url."""
+        doc = dict(self.manifest(url))
+        versions = []
+        for entry in doc.get("versions", []):
+            entry = dict(entry)
+            for key in ("url", "server_url", "client_url"):
+                if entry.get(key):
+                    entry[key] = _mirror_link(base_url, entry[key])
+            versions.append(entry)
+        doc["versions"] = versions
+        return json.dumps(doc).encode("utf-8")
+
+    def is_allowed(self, host):
+        if host not in self.allowed_hosts and not self._fallback_hosts_loaded:
+            # Custom jars can live anywhere the fallback lists say; learn those hosts once
+            for url in (MISSING_SERVERS_URL, MISSING_CLIENTS_URL):
+                try:
+                    self.manifest(url)
+                except IOError as e:
+                    _warn(str(e))
+            self._fallback_hosts_loaded = True
+        return host in self.allowed_hosts
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        path = os.path.join(self.cache_dir, "files", key[:2], key)
+        return path, path + ".ok" # The marker is written once the file is complete and verified
+
+    def etag(self, url):
+        return '"%s"' % hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def open(self, url):
         """
-        Updates the UI elements on the main thread after version details have been loaded.
+        Returns (path, transfer) for url: transfer is None if the file is complete on disk,
+        otherwise the _MirrorTransfer filling path, started here if nobody else has.
         """
-        self.show_details(details_text)
-
-        # Update instance variables
-        self.client_url = client_url
-        self.server_url = server_url
-        self.tech_info = tech_info
-
-        # Re-enable/disable buttons based on the newly loaded URLs and tech info
-        self.download_server_btn.config(state=tk.NORMAL if self.server_url else tk.DISABLED)
-        self.download_client_btn.config(state=tk.NORMAL if self.client_url else tk.DISABLED)
-        self.tech_btn.config(state=tk.NORMAL if self.tech_info else tk.DISABLED)
-
-    def show_details(self, text):
-        self.details.configure(state=tk.NORMAL)
-        self.details.delete("1.0", tk.END)
-        self.details.insert(tk.END, text)
-        self.details.configure(state=tk.DISABLED)
-
-    def show_technical(self):
-        messagebox.showinfo("Technical Details", "\n".join(self.tech_info))
-
-    def download_server(self):
-        self._download(self.server_url)
-
-    def download_client(self):
-        self._download(self.client_url)
-
-    def _download(self, url):
-        default_name = os.path.basename(url)
-        path = filedialog.asksaveasfilename(
-            defaultextension=".jar",
-            initialfile=default_name,
-            filetypes=[("Java Archive", "*.jar"), ("All files","*.*")]
-        )
-        if not path:
-            return
-        # show determinate progress bar
-        self.download_progress.grid()
-        self.download_progress['value'] = 0
-        # Disable all action buttons during download
-        self.download_server_btn.config(state=tk.DISABLED)
-        self.download_client_btn.config(state=tk.DISABLED)
-        self.tech_btn.config(state=tk.DISABLED)
-        self.search_button.config(state=tk.DISABLED)
-        self.search_entry.config(state=tk.DISABLED)
-        threading.Thread(target=self._download_thread, args=(url, path), daemon=True).start()
-
-    def _report_hook(self, block_num, block_size, total_size):
-        if total_size > 0:
-            percent = block_num * block_size * 100 / total_size
-            self.download_progress['value'] = min(percent, 100)
-            self.update_idletasks()
-
-    def _download_thread(self, url, path):
+        path, ok_path = self._paths(url)
+        with self._lock:
+            transfer = self._transfers.get(url)
+            if transfer is not None:
+                METRICS.cache("mirror", "joined") # Streams along with a download already running
+            elif os.path.exists(ok_path):
+                METRICS.cache("mirror", "hit")
+                return path, None
+            else:
+                METRICS.cache("mirror", "miss")
+                transfer = self._transfers[url] = _MirrorTransfer()
+                threading.Thread(target=self._fetch, args=(url, transfer), daemon=True).start()
+        return path, transfer
+
+    def _fetch(self, url, transfer):
+        path, ok_path = self._paths(url)
+        expected_sha1 = _content_sha1(url)
+        digest = hashlib.sha1()
         try:
-            urllib.request.urlretrieve(url, path, reporthook=self._report_hook)
-            messagebox.showinfo("Downloaded", f"Saved to: {path}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with METRICS.span("mirror.upstream") as span, \
+                    FETCHER.open(url, timeout=self.timeout) as resp, open(path, "wb") as f:
+                span.mark("first_byte")
+                length = resp.headers.get("Content-Length")
+                with transfer.cond:
+                    transfer.size = int(length) if length and length.isdigit() else None
+                    transfer.started = True
+                    transfer.cond.notify_all()
+                while True:
+                    block = resp.read(DOWNLOAD_BLOCK_SIZE)
+                    if not block:
+                        break
+                    f.write(block)
+                    f.flush() # Readers open the file separately and only read up to 'written'
+                    digest.update(block)
+                    with transfer.cond:
+                        transfer.written += len(block)
+                        transfer.cond.notify_all()
+                    span.bytes += len(block)
+            if transfer.size is not None and transfer.written != transfer.size:
+                raise IOError(f"Connection closed at byte {transfer.written} of {transfer.size}")
+            if expected_sha1 and digest.hexdigest() != expected_sha1:
+                raise ChecksumError(f"SHA1 mismatch: expected {expected_sha1}, got {digest.hexdigest()}")
+            open(ok_path, "wb").close()
         except Exception as e:
-            messagebox.showerror("Error", f"Download failed:\n{e}")
+            _warn(f"Mirror could not fetch {url}: {e}")
+            with transfer.cond:
+                transfer.error = e
+            with contextlib.suppress(OSError):
+                os.remove(path)
         finally:
-            # hide download progress and restore buttons based on current selection
-            self.download_progress.grid_remove()
-            # Re-enable buttons based on current selection if any
-            sel = self.vers_list.selection()
-            if sel:
-                idx = int(sel[0])
-                if idx < len(self.current_display_versions): # Check bounds
-                    v = self.current_display_versions[idx]
-                    # Re-trigger on_select to re-evaluate button states
-                    # This is cleaner than re-implementing the logic here
-                    self.on_select(None) # Pass None as event as we are not reacting to a real event
+            with self._lock:
+                del self._transfers[url]
+            with transfer.cond:
+                transfer.done = True
+                transfer.cond.notify_all()
+
+class _MirrorHandler(http.server.BaseHTTPRequestHandler):
+    """Serves <scheme>/<host>/<path> from the server's MirrorCache, and /metrics for Prometheus."""
+    protocol_version = "HTTP/1.1" # Keep-alive, which the install command's connection pool relies on
+    server_version = "MinecraftVersionDownloader-Mirror"
+
+    def do_GET(self):
+        mirror = self.server.mirror
+        if self.path == "/metrics":
+            return self._send_body(METRICS.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        scheme, _, rest = self.path.lstrip("/").partition("/")
+        host, _, path = rest.partition("/")
+        if scheme not in ("http", "https") or not host:
+            return self._send_status(404)
+        if not mirror.is_allowed(host):
+            return self._send_status(403)
+        url = f"{scheme}://{host}/{path}"
+        try:
+            if url in STARTUP_MANIFEST_URLS:
+                base_url = self.server.public_url or f"http://{self.headers.get('Host') or self.server.server_name}"
+                return self._send_manifest(mirror.rewritten_manifest(url, base_url))
+            path, transfer = mirror.open(url)
+            if transfer is None:
+                return self._send_file(path, mirror.etag(url))
+            return self._send_transfer(path, transfer)
+        except (ConnectionError, TimeoutError):
+            self.close_connection = True # The client went away
+        except Exception as e:
+            _warn(f"Mirror failed to serve {url}: {e}")
+            self._send_status(502)
+
+    def _send_status(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_manifest(self, body):
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send_body(body, "application/json", {"ETag": etag})
+
+    def _send_body(self, body, content_type, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path, etag):
+        size = os.path.getsize(path)
+        start, end, status = 0, size - 1, 200
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", "").strip())
+        if match and any(match.groups()) and self.headers.get("If-Range", etag) == etag:
+            first, last = match.groups()
+            if first:
+                start, end = int(first), min(int(last), size - 1) if last else size - 1
             else:
-                self.download_server_btn.config(state=tk.DISABLED)
-                self.download_client_btn.config(state=tk.DISABLED)
-                self.tech_btn.config(state=tk.DISABLED)
-
-            self.search_button.config(state=tk.NORMAL)
-            self.search_entry.config(state=tk.NORMAL)
+                start = max(0, size - int(last)) # Suffix range: the last N bytes
+            if start > end or start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = f.read(min(DOWNLOAD_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+
+    def _send_transfer(self, path, transfer):
+        # Ranges are not offered until the file is complete; clients fall back to one stream
+        with transfer.cond:
+            while not transfer.started and transfer.error is None:
+                transfer.cond.wait()
+            if not transfer.started:
+                error = transfer.error
+                return self._send_status(error.code if isinstance(error, urllib.error.HTTPError) else 502)
+            size = transfer.size
+        self.send_response(200)
+        if size is None:
+            self.send_header("Connection", "close") # The end of the body is where we close
+            self.close_connection = True
+        else:
+            self.send_header("Content-Length", str(size))
+        self.end_headers()
+        position = 0
+        with open(path, "rb") as f:
+            while True:
+                with transfer.cond:
+                    while transfer.written <= position and not transfer.done:
+                        transfer.cond.wait()
+                    available = transfer.written - position
+                    failed = transfer.error is not None
+                if available > 0:
+                    block = f.read(min(DOWNLOAD_BLOCK_SIZE, available))
+                    self.wfile.write(block)
+                    position += len(block)
+                elif failed:
+                    self.close_connection = True # Cut the body short so the client sees the failure
+                    return
+                else:
+                    return
+
+def select_versions(versions, types=None, pattern=None, after=None, before=None):
+    """
+    Filters a version list for batch runs. types are matched against the type shown in the
+    list, pattern is a regex searched in the id, and after/before compare releaseTime
+    against ISO prefixes (at or after / strictly before). Order is preserved.
+    """
+    types = {t.lower() for t in types} if types else None
+    regex = re.compile(pattern) if pattern else None
+    selected = []
+    for v in versions:
+        if types and v.get("type", "Custom Client").lower() not in types:
+            continue
+        if regex and not regex.search(v["id"]):
+            continue
+        if after or before:
+            released = v.get("releaseTime")
+            if not released or (after and released < after) or (before and released >= before):
+                continue
+        selected.append(v)
+    return selected
+
+def resolve_downloads(v, vjson):
+    """
+    Works out where a version's jars come from, with the same precedence as the detail
+    panel: Mojang's downloads first, then the record's fallback server or custom client
+    URL. Returns kind -> {"url", "sha1", "size", "source"} for 'client' and 'server'.
+    """
+    jars = {}
+    for kind, info in (vjson or {}).get("downloads", {}).items():
+        if kind in ("client", "server") and info.get("url"):
+            jars[kind] = {"url": info["url"], "sha1": info.get("sha1"), "size": info.get("size"),
+                          "source": "mojang"}
+    if "server" not in jars and v.server_url:
+        jars["server"] = {"url": v.server_url, "sha1": None, "size": None, "source": "fallback"}
+    if "client" not in jars and v.client_url:
+        jars["client"] = {"url": v.client_url, "sha1": None, "size": None, "source": "custom"}
+    return jars
+
+def _parse_size(text):
+    """Parses sizes like '750K', '10M' or '1.5G' (binary units) into bytes; an argparse type."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    size = text.strip().upper().rstrip("B")
+    try:
+        if size and size[-1] in units:
+            value = int(float(size[:-1]) * units[size[-1]])
+        else:
+            value = int(size)
+    except (ValueError, OverflowError): # OverflowError for 'inf'
+        value = -1
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"not a size: {text!r} (e.g. 750K, 20M or 1.5G)")
+    return value
+
+def _safe_filename(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', "_", text)
+
+class JsonLinesWriter:
+    """Writes one JSON object per line and flushes, safe to call from worker threads."""
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event, **fields):
+        line = json.dumps(dict(event=event, time=round(time.time(), 3), **fields))
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+def run_batch(args, out=None):
+    """The 'batch' command: downloads the selected jars without any GUI. Returns the exit code."""
+    emit = JsonLinesWriter(out or sys.stdout)
+    catalog, results = fetch_catalog()
+    for r in results.values():
+        if r.error:
+            emit("warning", url=r.url, error=str(r.error))
+    selected = select_versions(catalog.versions, args.type, args.match, args.after, args.before)
+    kinds = ("server", "client") if args.kind == "both" else (args.kind,)
+    emit("selected", versions=len(selected), kinds=list(kinds))
+
+    rate_limiter = RateLimiter(args.max_rate) if args.max_rate else None
+    downloader = SegmentedDownloader(segments=args.segments, rate_limiter=rate_limiter)
+    jar_store = JarStore(downloader)
+    version_cache = VersionJsonCache()
+    if not args.dry_run:
+        os.makedirs(args.output, exist_ok=True)
+    totals = {"ok": 0, "failed": 0, "missing": 0, "bytes": 0}
+    totals_lock = threading.Lock()
+
+    def count(key, amount=1):
+        with totals_lock:
+            totals[key] += amount
+
+    def process(v):
+        try:
+            vjson = version_cache.get(v) if "url" in v else {}
+        except Exception as e:
+            emit("error", id=v["id"], error=f"Could not load version JSON: {e}")
+            count("failed", len(kinds))
+            return
+        jars = resolve_downloads(v, vjson)
+        for kind in kinds:
+            jar = jars.get(kind)
+            if not jar:
+                emit("missing", id=v["id"], kind=kind)
+                count("missing")
+                continue
+            path = os.path.join(args.output, f"{_safe_filename(v['id'])}-{kind}.jar")
+            if args.dry_run:
+                emit("planned", id=v["id"], kind=kind, path=path, **jar)
+                continue
+            emit("start", id=v["id"], kind=kind, url=jar["url"], source=jar["source"])
+            last_report = [0.0]
+            def progress(done, total, v=v, kind=kind, last_report=last_report):
+                now = time.monotonic()
+                if now - last_report[0] >= 1.0:
+                    last_report[0] = now
+                    emit("progress", id=v["id"], kind=kind, bytes=done, total=total)
+            started = time.monotonic()
+            try:
+                if jar["sha1"]:
+                    from_store = jar_store.fetch(jar["url"], path, jar["sha1"], jar["size"], progress=progress)
+                else:
+                    downloader.download(jar["url"], path, progress=progress)
+                    from_store = False
+            except Exception as e:
+                emit("error", id=v["id"], kind=kind, url=jar["url"], error=str(e))
+                count("failed")
+                continue
+            size = os.path.getsize(path)
+            seconds = time.monotonic() - started
+            emit("done", id=v["id"], kind=kind, path=path, bytes=size, sha1=jar["sha1"],
+                 from_store=from_store, seconds=round(seconds, 3))
+            count("ok")
+            if not from_store:
+                count("bytes", size)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="batch") as pool:
+        list(pool.map(process, selected))
+    emit("summary", seconds=round(time.monotonic() - started, 3), **totals)
+    return 1 if totals["failed"] else 0
+
+def run_install(args, out=None):
+    """The 'install' command: installs a full client (jar, libraries, assets) for one version."""
+    emit = JsonLinesWriter(out or sys.stdout)
+    catalog, _ = fetch_catalog()
+    v = catalog.get(args.version)
+    if v is None or "url" not in v:
+        emit("error", id=args.version, error="Not a known Mojang version; only those can be installed")
+        return 1
+    try:
+        vjson = VersionJsonCache().get(v)
+    except Exception as e:
+        emit("error", id=v["id"], error=f"Could not load version JSON: {e}")
+        return 1
+    installer = ClientInstaller(args.directory, JarStore(SegmentedDownloader()), workers=args.workers)
+    last_report = [0.0]
+    def progress(stats):
+        now = time.monotonic()
+        if now - last_report[0] >= 1.0:
+            last_report[0] = now
+            emit("progress", id=v["id"], **stats)
+    try:
+        result = installer.install(v, vjson, progress=progress)
+    except Exception as e:
+        # Per-file failures are counted in the summary; this is the version JSON or the asset index
+        emit("error", id=v["id"], error=str(e))
+        return 1
+    emit("summary", id=v["id"], directory=os.path.abspath(args.directory), **result)
+    return 1 if result["failed"] else 0
+
+def run_inspect(args, out=None):
+    """
+    The 'inspect' command: lists what is inside a jar without downloading it. The target is
+    a version id (its --kind jar, from the jar store if it is there), a jar URL or a local path.
+    """
+    emit = JsonLinesWriter(out or sys.stdout)
+    try:
+        if os.path.isfile(args.target):
+            contents = JarContents.from_path(args.target)
+        elif "://" in args.target:
+            contents = JarContents.from_url(args.target)
+        else:
+            catalog, _ = fetch_catalog()
+            v = catalog.get(args.target)
+            if v is None:
+                emit("error", id=args.target, error="Unknown version, jar URL or file")
+                return 1
+            jar = resolve_downloads(v, VersionJsonCache().get(v) if "url" in v else {}).get(args.kind)
+            if jar is None:
+                emit("missing", id=v["id"], kind=args.kind)
+                return 1
+            contents = open_jar(jar, JarStore(SegmentedDownloader()))
+    except (OSError, ValueError, http.client.HTTPException, struct.error) as e:
+        emit("error", target=args.target, error=str(e))
+        return 1
+    with contents:
+        try:
+            summary = contents.summary() # Reads the manifest, and the listings of a bundler jar
+        except (OSError, ValueError, http.client.HTTPException, struct.error, zlib.error) as e:
+            emit("error", target=args.target, error=str(e))
+            return 1
+        emit("summary", target=args.target, **summary)
+        if args.list:
+            for entry in contents.entries:
+                emit("entry", name=entry.name, size=entry.size, compressed_size=entry.compressed_size)
+        failed = False
+        for name in args.read or ():
+            try:
+                emit("member", name=name, text=contents.read(name).decode("utf-8", "replace"))
+            except (KeyError, ValueError, OSError, struct.error, zlib.error) as e:
+                emit("error", name=name, error=f"Not in the jar: {name}" if isinstance(e, KeyError) else str(e))
+                failed = True
+        emit("done", fetched=contents.fetched, size=contents.size)
+    return 1 if failed else 0
+
+def run_watch(args, out=None):
+    """
+    The 'watch' command: polls the manifests and reports versions that were added, changed
+    or removed. With --prefetch it also downloads the server jars of new and changed
+    releases (or --type/--match) into the jar store, so they are on disk before anyone
+    asks. It keeps its own manifest cache and snapshot, so a GUI or batch run refreshing
+    theirs in between cannot hide a change from it.
+    """
+    emit = JsonLinesWriter(out or sys.stdout)
+    watch_dir = os.path.join(CACHE_DIR, "watch")
+    loader = ManifestLoader(watch_dir)
+    snapshot = CatalogSnapshot(os.path.join(watch_dir, "catalog.sqlite"))
+    catalog = snapshot.load()
+    if catalog is None:
+        # First run: whatever is listed now is the baseline, only later changes are reported
+        catalog, _ = fetch_catalog(loader, snapshot)
+        emit("baseline", versions=len(catalog))
+    watcher = ManifestWatcher(catalog, loader, snapshot)
+
+    rate_limiter = RateLimiter(args.max_rate) if args.max_rate else None
+    downloader = SegmentedDownloader(rate_limiter=rate_limiter)
+    jar_store = JarStore(downloader)
+    version_cache = VersionJsonCache()
+    if args.prefetch and args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    def prefetch(v):
+        try:
+            # Only versions in the delta get here, so unchanged versions never cost a fetch
+            vjson = version_cache.get(v) if "url" in v else {}
+            jar = resolve_downloads(v, vjson).get("server")
+            if not jar:
+                emit("missing", id=v["id"], kind="server")
+                return
+            if args.output:
+                path = os.path.join(args.output, f"{_safe_filename(v['id'])}-server.jar")
+            elif jar["sha1"]:
+                path = jar_store.path_for(jar["sha1"])
+            else:
+                emit("skipped", id=v["id"], kind="server", reason="no SHA1 to store it under; use --output")
+                return
+            if jar["sha1"]:
+                from_store = jar_store.fetch(jar["url"], path, jar["sha1"], jar["size"])
+            else:
+                downloader.download(jar["url"], path)
+                from_store = False
+            emit("prefetched", id=v["id"], kind="server", path=path, sha1=jar["sha1"], from_store=from_store)
+        except Exception as e:
+            emit("error", id=v["id"], kind="server", error=str(e))
+
+    def on_change(catalog, delta):
+        emit("update", versions=len(catalog), added=delta.added, changed=delta.changed, removed=delta.removed)
+        if args.prefetch:
+            candidates = [catalog.get(version_id) for version_id in delta.added + delta.changed]
+            for v in select_versions(candidates, args.type or ["release"], args.match):
+                prefetch(v)
+
+    emit("watching", versions=len(catalog), interval=None if args.once else args.interval)
+    if args.once:
+        delta = watcher.poll()
+        if delta is not None:
+            on_change(watcher.catalog, delta)
+        return 0
+    try:
+        watcher.run(on_change, threading.Event(), args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def run_mirror(args, out=None):
+    """
+    The 'mirror' command: serves manifests, version JSONs and jars to other machines on the
+    LAN, downloading each from upstream only once. Point clients at it with --base-url.
+    """
+    emit = JsonLinesWriter(out or sys.stdout)
+    if _base_url:
+        emit("error", error="The mirror fetches from upstream itself; do not combine it with --base-url")
+        return 2
+    server = http.server.ThreadingHTTPServer((args.host, args.port), _MirrorHandler)
+    server.mirror = MirrorCache(args.cache_dir, args.manifest_ttl, args.allow_host or ())
+    server.public_url = args.public_url.rstrip("/") if args.public_url else None
+    host, port = server.server_address[:2]
+    shown_host = platform.node() if host in ("0.0.0.0", "") else host
+    emit("listening", host=host, port=port, base_url=server.public_url or f"http://{shown_host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+def write_metrics(path, metrics_format=None):
+    """Writes METRICS to path ('-' for stderr) as JSON or Prometheus text."""
+    if metrics_format is None:
+        metrics_format = "prometheus" if path.endswith(".prom") else "json"
+    text = METRICS.to_prometheus() if metrics_format == "prometheus" else METRICS.to_json() + "\n"
+    if path == "-":
+        sys.stderr.write(text)
+    else:
+        _atomic_write(os.path.abspath(path), text.encode("utf-8"))
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="mcdownloader",
+        description="Minecraft Version Downloader. Run without a command to open the GUI.")
+    parser.add_argument("--base-url", metavar="URL", default=os.environ.get(BASE_URL_ENV),
+                        help=f"download everything through the mirror at URL, see 'mirror' (default: ${BASE_URL_ENV})")
+    parser.add_argument("--mirror", action="append", metavar="URL",
+                        default=os.environ.get(MIRRORS_ENV, "").split() or None,
+                        help="an equivalent mirror to race and fail over to (repeatable; default: "
+                             f"${MIRRORS_ENV}, space-separated). The fastest source is tried first")
+    parser.add_argument("--retries", type=int, default=FETCH_RETRIES,
+                        help=f"retry rounds for a failed request, with backoff (default: {FETCH_RETRIES})")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="when the command ends, write timing and cache metrics to PATH ('-' for stderr)")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"),
+                        help="format for --metrics (default: prometheus for *.prom files, else json)")
+    commands = parser.add_subparsers(dest="command")
+
+    batch = commands.add_parser(
+        "batch", help="download server/client jars for a selection of versions",
+        description="Downloads jars for the selected versions and reports progress as JSON lines on stdout.")
+    batch.add_argument("--type", action="append", metavar="TYPE",
+                       help="only versions of this type, e.g. release, snapshot (repeatable)")
+    batch.add_argument("--releases", dest="type", action="append_const", const="release",
+                       help="shorthand for --type release")
+    batch.add_argument("--match", metavar="REGEX", help="only versions whose id matches this regex")
+    batch.add_argument("--after", metavar="TIME", help="releaseTime at or after this ISO date/prefix")
+    batch.add_argument("--before", metavar="TIME", help="releaseTime before this ISO date/prefix")
+    batch.add_argument("--kind", choices=("server", "client", "both"), default="server")
+    batch.add_argument("-o", "--output", default=".", help="directory to save jars in (default: .)")
+    batch.add_argument("--workers", type=int, default=4, help="versions processed in parallel (default: 4)")
+    batch.add_argument("--segments", type=int, default=DOWNLOAD_SEGMENTS,
+                       help=f"parallel Range requests per jar (default: {DOWNLOAD_SEGMENTS})")
+    batch.add_argument("--max-rate", metavar="RATE", type=_parse_size,
+                       help="overall bandwidth cap in bytes/s, with optional K/M/G suffix, e.g. 20M")
+    batch.add_argument("--dry-run", action="store_true", help="resolve and list jars without downloading")
+    batch.set_defaults(func=run_batch)
+
+    install = commands.add_parser(
+        "install", help="install a runnable client: jar, libraries and assets",
+        description="Installs a client into a launcher-style directory, reporting progress as JSON lines.")
+    install.add_argument("version", help="version id, e.g. 1.20.1")
+    install.add_argument("-d", "--directory", default="minecraft",
+                         help="install directory (default: ./minecraft)")
+    install.add_argument("--workers", type=int, default=INSTALL_WORKERS,
+                         help=f"concurrent downloads and keep-alive connections (default: {INSTALL_WORKERS})")
+    install.set_defaults(func=run_install)
+
+    inspect = commands.add_parser(
+        "inspect", help="list what is inside a jar without downloading it",
+        description="Reads only a jar's ZIP directory (with HTTP Range requests, or memory-mapped if it is "
+                    "local) and reports its entries, Main-Class and bundled libraries as JSON lines.")
+    inspect.add_argument("target", help="a version id, a jar URL or a path to a local jar")
+    inspect.add_argument("--kind", choices=("server", "client"), default="server",
+                         help="which jar of a version to inspect (default: server)")
+    inspect.add_argument("--list", action="store_true", help="also list every entry")
+    inspect.add_argument("--read", action="append", metavar="MEMBER",
+                         help="print a small member, e.g. META-INF/MANIFEST.MF (repeatable)")
+    inspect.set_defaults(func=run_inspect)
+
+    watch = commands.add_parser(
+        "watch", help="poll for new versions and optionally pre-download their server jars",
+        description="Polls the manifests with conditional requests and reports added, changed and removed "
+                    "versions as JSON lines. The first run records a baseline.")
+    watch.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                       help=f"seconds between polls (default: {WATCH_INTERVAL})")
+    watch.add_argument("--once", action="store_true", help="poll once and exit, e.g. from cron")
+    watch.add_argument("--prefetch", action="store_true",
+                       help="download the server jars of new and changed versions that match the filters")
+    watch.add_argument("--type", action="append", metavar="TYPE",
+                       help="only prefetch versions of this type (repeatable, default: release)")
+    watch.add_argument("--match", metavar="REGEX", help="only prefetch versions whose id matches this regex")
+    watch.add_argument("-o", "--output", help="also save prefetched jars in this directory "
+                                              "(default: only the local jar store)")
+    watch.add_argument("--max-rate", metavar="RATE", type=_parse_size, help="bandwidth cap for prefetching, e.g. 20M")
+    watch.set_defaults(func=run_watch)
+
+    mirror = commands.add_parser(
+        "mirror", help="serve manifests and jars to other machines, fetching each from upstream once",
+        description="Runs an HTTP mirror on the LAN. Clients started with --base-url http://HOST:PORT download "
+                    "through it; each file is fetched upstream once and streamed to every client asking for it.")
+    mirror.add_argument("--host", default="0.0.0.0", help="address to listen on (default: all interfaces)")
+    mirror.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080)")
+    mirror.add_argument("--cache-dir", default=None, help=f"where mirrored files are kept (default: {CACHE_DIR})")
+    mirror.add_argument("--manifest-ttl", type=float, default=MIRROR_MANIFEST_TTL,
+                        help=f"seconds between upstream revalidations of a manifest (default: {MIRROR_MANIFEST_TTL})")
+    mirror.add_argument("--public-url", metavar="URL",
+                        help="base URL clients reach the mirror at, if not the Host they send (e.g. behind a proxy)")
+    mirror.add_argument("--allow-host", action="append", metavar="HOST",
+                        help="also proxy downloads from HOST (repeatable); Mojang hosts and those "
+                             "in the fallback lists are always allowed")
+    mirror.set_defaults(func=run_mirror)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_arg_parser().parse_args(argv)
+    set_base_url(args.base_url)
+    set_mirrors(args.mirror)
+    FETCHER.retries = max(0, args.retries)
+    try:
+        if args.command is None:
+            # tkinter is only imported for the GUI, so the headless commands never load it.
+            # Register this module under its import name so the GUI shares it when run as a script.
+            sys.modules.setdefault("mcdownloader", sys.modules[__name__])
+            from mcdownloader_gui import App
+            App().mainloop()
+            return 0
+        return args.func(args)
+    finally:
+        if args.metrics:
+            write_metrics(args.metrics, args.metrics_format)
 
 
 if __name__ == "__main__":
-    App().mainloop()
\ No newline at end of file
+    sys.exit(main())
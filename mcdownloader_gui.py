@@ -0,0 +1,1020 @@
+import tkinter as tk
+from tkinter import messagebox, ttk
+from tkinter.scrolledtext import ScrolledText
+import threading
+import queue
+import traceback
+import os
+
+from mcdownloader import (
+    MANIFEST_URL, MISSING_SERVERS_URL, MISSING_CLIENTS_URL, STARTUP_MANIFEST_URLS,
+    ManifestLoader, VersionJsonCache, VersionPrefetcher, DetailLoader, SegmentedDownloader, JarStore,
+    ClientInstaller, VersionSearchIndex, CatalogSnapshot, ManifestWatcher, METRICS, FETCHER,
+    WATCH_INTERVAL, MAX_MEMBER_SIZE, build_catalog, open_jar,
+)
+
+SEARCH_DEBOUNCE_MS = 150
+PREFETCH_RADIUS = 3 # Versions on each side of the selection whose JSON is warmed in the background
+UI_FRAME_RATE = 30 # How often per second queued UI updates from worker threads are applied
+DIAGNOSTICS_REFRESH_MS = 1000
+
+class UiEventQueue:
+    """
+    The one channel from worker threads to Tk. Workers call post() to run a function on
+    the main thread, or post_latest() for state like progress where only the newest value
+    per key matters. The main loop drains both every frame, so a fast download costs at
+    most one redraw per frame and never waits on Tk, however many jobs are reporting.
+    """
+    def __init__(self, root, fps=UI_FRAME_RATE):
+        self.root = root
+        self.interval = max(1, 1000 // fps)
+        self._calls = queue.SimpleQueue()
+        self._latest = {} # key -> (function, args), replaced by every post_latest()
+        self._lock = threading.Lock()
+        self.root.after(self.interval, self._drain)
+
+    def post(self, function, *args):
+        self._calls.put((function, args))
+
+    def post_latest(self, key, function, *args):
+        with self._lock:
+            self._latest[key] = (function, args)
+
+    def _drain(self):
+        try:
+            with self._lock:
+                latest, self._latest = self._latest, {}
+            calls = list(latest.values())
+            while True:
+                try:
+                    calls.append(self._calls.get_nowait())
+                except queue.Empty:
+                    break
+            for function, args in calls:
+                try:
+                    function(*args)
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            self.root.after(self.interval, self._drain)
+
+class VirtualListView(ttk.Frame):
+    """
+    A Treeview with its own scrollbar that only materializes the rows that fit in the
+    viewport and recycles them while scrolling, so neither scrolling nor swapping in a
+    new result set costs more than a screenful of Tk calls, however long the list is.
+    row_values(item) must return the column values shown for an item.
+    Selection is tracked by index into the current rows; <<ListSelect>> is generated
+    on this frame whenever that index changes (or is cleared).
+    """
+    def __init__(self, master, columns, row_values, column_width=200):
+        super().__init__(master)
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.row_values = row_values
+        self.rows = []
+        self.offset = 0 # Index of the item shown in the first materialized row
+        self.selected = None # Index into rows of the selected item
+        self._shown = [] # Values currently displayed in each materialized row
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode='browse')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, anchor="w", width=column_width)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.tree.bind("<Configure>", lambda e: self._render())
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3)) # X11 wheel up
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))  # X11 wheel down
+        for key, rows, pages in (("<Up>", -1, 0), ("<Down>", 1, 0), ("<Prior>", 0, -1), ("<Next>", 0, 1)):
+            self.tree.bind(key, lambda e, rows=rows, pages=pages: self._on_key(rows, pages))
+        self.tree.bind("<Home>", lambda e: self._on_key(-len(self.rows), 0))
+        self.tree.bind("<End>", lambda e: self._on_key(len(self.rows), 0))
+
+    def set_rows(self, rows):
+        """Shows a new list of items. Only the visible rows whose values differ are touched."""
+        had_selection = self.selected is not None
+        self.rows = rows
+        self.offset = 0
+        self.selected = None
+        self._render()
+        if had_selection:
+            self.event_generate("<<ListSelect>>")
+
+    def update_rows(self, rows, key):
+        """
+        Swaps in a new version of the current list, such as the same versions with a few
+        added or removed. Items are matched by key(item), so the selected item stays selected
+        and the rows in view stay put, except at the very top, where new items show up.
+        Only visible rows whose values changed are redrawn.
+        """
+        positions = {key(item): i for i, item in enumerate(rows)}
+        selected = None
+        if self.selected is not None:
+            selected = positions.get(key(self.rows[self.selected]))
+        if self.offset and self.offset < len(self.rows):
+            # Anchor on the first row in view, or the next one after it that is still listed
+            self.offset = next((positions[key(item)] for item in self.rows[self.offset:]
+                                if key(item) in positions), len(rows))
+        lost_selection = self.selected is not None and selected is None
+        self.rows = rows
+        self.selected = selected
+        self._render()
+        if lost_selection:
+            self.event_generate("<<ListSelect>>")
+
+    def selected_index(self):
+        return self.selected
+
+    def _visible_count(self):
+        """Number of rows that fit in the Treeview's current height."""
+        rowheight = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        header = bbox[1] if bbox else rowheight
+        return max(1, (self.tree.winfo_height() - header) // rowheight)
+
+    def _render(self):
+        count = min(self._visible_count(), len(self.rows))
+        self.offset = max(0, min(self.offset, len(self.rows) - count))
+
+        # Grow or shrink the pool of materialized rows to what fits
+        children = list(self.tree.get_children())
+        while len(children) < count:
+            children.append(self.tree.insert("", "end", values=()))
+            self._shown.append(None)
+        while len(children) > count:
+            self.tree.delete(children.pop())
+            self._shown.pop()
+
+        for row, iid in enumerate(children):
+            values = tuple(self.row_values(self.rows[self.offset + row]))
+            if values != self._shown[row]:
+                self.tree.item(iid, values=values)
+                self._shown[row] = values
+
+        if self.selected is not None and self.offset <= self.selected < self.offset + count:
+            iid = children[self.selected - self.offset]
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        elif self.tree.selection():
+            self.tree.selection_set(())
+
+        if self.rows:
+            self.scrollbar.set(self.offset / len(self.rows), (self.offset + count) / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_by(self, rows):
+        self.offset += rows
+        self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.rows))
+            self._render()
+        elif action == "scroll":
+            step = int(amount) * (self._visible_count() if unit == "pages" else 1)
+            self.scroll_by(step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        notches = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self.scroll_by(-notches * 3)
+        return "break"
+
+    def _on_key(self, rows, pages):
+        if self.rows:
+            current = self.offset if self.selected is None else self.selected
+            target = current + rows + pages * self._visible_count()
+            self._select(max(0, min(target, len(self.rows) - 1)))
+        return "break"
+
+    def _select(self, index):
+        # Scroll just enough to bring the selected row into view
+        page = self._visible_count()
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + page:
+            self.offset = index - page + 1
+        changed = index != self.selected
+        self.selected = index
+        self._render()
+        if changed:
+            self.event_generate("<<ListSelect>>")
+
+    def _on_tree_select(self, event):
+        # Fired for clicks and for our own selection_set calls; only a different item counts
+        sel = self.tree.selection()
+        if not sel:
+            return
+        index = self.offset + self.tree.index(sel[0])
+        if index != self.selected and index < len(self.rows):
+            self._select(index)
+
+class DiagnosticsWindow(tk.Toplevel):
+    """
+    Shows what METRICS has recorded: one row per instrumented step (time, bytes,
+    throughput, time to first byte), per cache and per download host (moving-average and
+    percentile response times, which rank mirrors), refreshed while the window is open.
+    """
+    COLUMNS = ("Step", "Runs", "Errors", "Total ms", "Avg ms", "Max ms", "First byte ms", "Bytes", "MB/s", "Cache")
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Diagnostics")
+        self.geometry("980x360")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, columns=self.COLUMNS, show="headings")
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col)
+            text_column = col in ("Step", "Cache")
+            self.tree.column(col, width=200 if text_column else 80, anchor="w" if text_column else "e")
+        self.tree.grid(row=0, column=0, sticky="nsew", padx=10, pady=(10, 5))
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns", pady=(10, 5))
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        btn_frame = ttk.Frame(self)
+        btn_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
+        ttk.Button(btn_frame, text="Reset", command=self.reset).pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text="Export Prometheus...", command=lambda: self.export("prometheus")).pack(side=tk.RIGHT)
+        ttk.Button(btn_frame, text="Export JSON...", command=lambda: self.export("json")).pack(side=tk.RIGHT, padx=5)
+        self.refresh()
+
+    def refresh(self):
+        data = METRICS.snapshot()
+        self.tree.delete(*self.tree.get_children())
+        caches = dict(data["caches"])
+        for name, s in data["spans"].items():
+            first_byte = s["phases"].get("first_byte")
+            self.tree.insert("", tk.END, values=(
+                name, s["count"], s["errors"], f"{s['seconds'] * 1000:.1f}", f"{s['avg_seconds'] * 1000:.2f}",
+                f"{s['max_seconds'] * 1000:.1f}", f"{first_byte / s['count'] * 1000:.1f}" if first_byte else "",
+                s["bytes"] or "", s["mb_per_sec"] or "", self._cache_text(caches.pop(name, {}))))
+        for name, outcomes in caches.items(): # Caches without a span of their own
+            self.tree.insert("", tk.END, values=(name, sum(outcomes.values()), "", "", "", "", "", "", "",
+                                                 self._cache_text(outcomes)))
+        for host, h in FETCHER.latency.snapshot().items():
+            percentiles = "  ".join(f"{name} {h[name] * 1000:.1f} ms" for name in ("p50", "p95") if h[name] is not None)
+            self.tree.insert("", tk.END, values=(f"host {host}", h["samples"], h["failures"], "",
+                                                 f"{h['average'] * 1000:.2f}", "", "", "", "", percentiles))
+        self._refresh_job = self.after(DIAGNOSTICS_REFRESH_MS, self.refresh)
+
+    def destroy(self):
+        self.after_cancel(self._refresh_job)
+        super().destroy()
+
+    @staticmethod
+    def _cache_text(outcomes):
+        return "  ".join(f"{outcome} {count}" for outcome, count in sorted(outcomes.items()))
+
+    def reset(self):
+        METRICS.reset()
+
+    def export(self, metrics_format):
+        from tkinter import filedialog
+        prometheus = metrics_format == "prometheus"
+        path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".prom" if prometheus else ".json",
+            initialfile="mcdownloader-metrics.prom" if prometheus else "mcdownloader-metrics.json",
+            filetypes=[("Prometheus text", "*.prom")] if prometheus else [("JSON", "*.json")])
+        if not path:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(METRICS.to_prometheus() if prometheus else METRICS.to_json())
+
+class TechnicalDetailsWindow(tk.Toplevel):
+    """
+    The version JSON's URLs and SHA1s, plus what is inside the server or client jar on
+    request. Only the jar's ZIP directory is read (see JarContents), with Range requests
+    or from the jar store, and selecting a small entry reads just that member.
+    jars maps 'server'/'client' to {"url", "sha1", "size"}.
+    """
+    def __init__(self, master, tech_info, jars, jar_store, ui):
+        super().__init__(master)
+        self.title("Technical Details")
+        self.geometry("900x600")
+        self.jars = jars
+        self.jar_store = jar_store
+        self.ui = ui
+        self.contents = None # JarContents being shown
+        self._generation = 0 # Bumped per request, so only the latest inspection or read is shown
+        self.rowconfigure(2, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=1)
+
+        info = ScrolledText(self, wrap=tk.WORD, height=7)
+        info.grid(row=0, column=0, columnspan=2, sticky="ew", padx=10, pady=(10, 5))
+        info.insert(tk.END, "\n".join(tech_info))
+        info.configure(state=tk.DISABLED)
+
+        btn_frame = ttk.Frame(self)
+        btn_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=5)
+        self.inspect_buttons = []
+        for kind in ("server", "client"):
+            btn = ttk.Button(btn_frame, text=f"Inspect {kind.capitalize()} Jar", command=lambda k=kind: self.inspect(k),
+                             state=tk.NORMAL if kind in jars else tk.DISABLED)
+            btn.pack(side=tk.LEFT, padx=(0, 5))
+            self.inspect_buttons.append(btn)
+        self.status = ttk.Label(btn_frame, text="")
+        self.status.pack(side=tk.LEFT, padx=5)
+
+        self.entries_view = VirtualListView(self, ("Entry", "Size", "Compressed"),
+                                            lambda e: (e.name, e.size, e.compressed_size), column_width=120)
+        self.entries_view.tree.column("Entry", width=300)
+        self.entries_view.grid(row=2, column=0, sticky="nsew", padx=(10, 5), pady=(5, 10))
+        self.entries_view.bind("<<ListSelect>>", self._on_select_entry)
+        self.member = ScrolledText(self, wrap=tk.NONE)
+        self.member.grid(row=2, column=1, sticky="nsew", padx=(5, 10), pady=(5, 10))
+        self._show_member("")
+
+    def inspect(self, kind):
+        self._generation += 1
+        self.status.config(text=f"Reading the {kind} jar's directory...")
+        for btn in self.inspect_buttons:
+            btn.config(state=tk.DISABLED)
+        threading.Thread(target=self._inspect_thread, args=(kind, self.jars[kind], self._generation),
+                         daemon=True).start()
+
+    def _inspect_thread(self, kind, jar, generation):
+        try:
+            contents = open_jar(jar, self.jar_store)
+            summary = contents.summary()
+        except Exception as e:
+            self.ui.post(self._show_error, f"Could not inspect the {kind} jar: {e}", generation)
+            return
+        self.ui.post(self._show_contents, contents, summary, generation)
+
+    def _enable_buttons(self):
+        for btn, kind in zip(self.inspect_buttons, ("server", "client")):
+            btn.config(state=tk.NORMAL if kind in self.jars else tk.DISABLED)
+
+    def _show_error(self, message, generation):
+        if generation == self._generation and self.winfo_exists():
+            self._enable_buttons()
+            self.status.config(text=message)
+
+    def _show_contents(self, contents, summary, generation):
+        if generation != self._generation or not self.winfo_exists():
+            contents.close()
+            return
+        if self.contents is not None:
+            self.contents.close()
+        self.contents = contents
+        self._enable_buttons()
+        lines = [f"{summary['entries']} entries, {summary['classes']} classes",
+                 f"Main-Class: {summary['main_class'] or 'none'}"]
+        if "bundled_versions" in summary:
+            lines.append(f"Bundles {', '.join(summary['bundled_versions'])} "
+                         f"with {len(summary['bundled_libraries'])} libraries "
+                         f"(starts {summary.get('bundled_main_class', 'unknown')})")
+        lines.append(f"Read {summary['fetched'] / 1024:.0f} KB of {summary['size'] / 1e6:.1f} MB")
+        self.status.config(text="   ".join(lines))
+        self.entries_view.set_rows(contents.entries)
+        self._show_member("Select an entry to show it.")
+
+    def _on_select_entry(self, event):
+        index = self.entries_view.selected_index()
+        if index is None or self.contents is None:
+            return
+        entry = self.entries_view.rows[index]
+        self._generation += 1
+        if entry.size > MAX_MEMBER_SIZE:
+            self._show_member(f"{entry.name} is {entry.size} bytes, too large to show.")
+            return
+        self._show_member(f"Reading {entry.name}...")
+        threading.Thread(target=self._read_thread, args=(self.contents, entry, self._generation),
+                         daemon=True).start()
+
+    def _read_thread(self, contents, entry, generation):
+        try:
+            data = contents.read(entry.name)
+            if b"\0" in data[:1024]:
+                text = f"{entry.name}: binary, {len(data)} bytes"
+            else:
+                text = data.decode("utf-8", "replace")
+        except Exception as e:
+            text = f"Could not read {entry.name}: {e}"
+        self.ui.post(self._show_read, text, generation)
+
+    def _show_read(self, text, generation):
+        if generation == self._generation and self.winfo_exists():
+            self._show_member(text)
+
+    def _show_member(self, text):
+        self.member.configure(state=tk.NORMAL)
+        self.member.delete("1.0", tk.END)
+        self.member.insert(tk.END, text)
+        self.member.configure(state=tk.DISABLED)
+
+    def destroy(self):
+        if self.contents is not None:
+            self.contents.close()
+            self.contents = None
+        super().destroy()
+
+class App(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Minecraft Version Downloader")
+        self.geometry("900x600")
+        self.style = ttk.Style(self)
+        self.style.configure('Treeview', rowheight=24)
+
+        self.rowconfigure(0, weight=0)
+        self.rowconfigure(1, weight=0)
+        self.rowconfigure(2, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=2)
+
+        # Progress bar for loading versions (spans both columns)
+        self.load_progress = ttk.Progressbar(self, mode='indeterminate')
+        self.load_progress.grid(row=0, column=0, columnspan=2, sticky='ew', padx=10, pady=10)
+
+        # Search bar frame
+        search_frame = ttk.Frame(self)
+        search_frame.grid(row=1, column=0, columnspan=2, sticky='ew', padx=10, pady=(0, 10))
+        search_frame.columnconfigure(0, weight=1)
+        search_frame.columnconfigure(1, weight=0)
+        search_frame.columnconfigure(2, weight=0)
+        search_frame.columnconfigure(3, weight=0)
+        search_frame.columnconfigure(4, weight=0)
+
+        self.search_entry = ttk.Entry(search_frame)
+        self.search_entry.grid(row=0, column=0, sticky='ew', padx=(0, 5))
+        self.search_entry.bind("<Return>", self.perform_search_event)
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+
+        self.search_button = ttk.Button(search_frame, text="Search", command=self.search_versions)
+        self.search_button.grid(row=0, column=1, sticky='e')
+
+        self.search_as_you_type = tk.BooleanVar(self, value=True)
+        ttk.Checkbutton(search_frame, text="Search as you type", variable=self.search_as_you_type
+                        ).grid(row=0, column=2, sticky='e', padx=(5, 0))
+
+        # Polls the manifests in the background once the list has loaded (see toggle_watch)
+        self.watch_enabled = tk.BooleanVar(self, value=False)
+        self.watch_check = ttk.Checkbutton(search_frame, text="Watch for new versions", variable=self.watch_enabled,
+                                           command=self.toggle_watch, state=tk.DISABLED)
+        self.watch_check.grid(row=0, column=3, sticky='e', padx=(5, 0))
+        self.watch_status = ttk.Label(search_frame, text="")
+        self.watch_status.grid(row=0, column=4, sticky='e', padx=(5, 0))
+        self._watch_stop = None # Event that stops the running watch thread, if any
+
+        # Frame to hold version list and scrollbar
+        list_frame = ttk.Frame(self)
+        list_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=5)
+        list_frame.rowconfigure(0, weight=1)
+        list_frame.columnconfigure(0, weight=1)
+
+        # Version list on left (virtualized, with its own scrollbar)
+        cols = ("Version", "Type", "Release Time")
+        self.vers_list = VirtualListView(list_frame, cols, self._version_row_values)
+        self.vers_list.grid(row=0, column=0, sticky="nsew")
+        self.vers_list.bind("<<ListSelect>>", self.on_select)
+
+        # Details panel on right
+        detail_frame = ttk.Frame(self, padding=(10,10))
+        detail_frame.grid(row=2, column=1, sticky="nsew")
+        detail_frame.columnconfigure(0, weight=1)
+        detail_frame.rowconfigure(1, weight=1)
+
+        # Details text
+        self.details = ScrolledText(detail_frame, wrap=tk.WORD, height=15)
+        self.details.grid(row=0, column=0, sticky="nsew")
+        self.details.configure(state=tk.DISABLED)
+
+        # Download progress bar under details
+        self.download_progress = ttk.Progressbar(detail_frame, mode='determinate', maximum=100)
+        self.download_progress.grid(row=1, column=0, sticky='ew', pady=(5,10))
+        self.download_progress.grid_remove()
+
+        # Buttons
+        btn_frame = ttk.Frame(detail_frame)
+        btn_frame.grid(row=2, column=0, pady=(0,10), sticky="ew")
+        btn_frame.columnconfigure((0,1,2,3,4), weight=1)
+
+        self.download_server_btn = ttk.Button(
+            btn_frame, text="Download Server Jar", command=self.download_server, state=tk.DISABLED)
+        self.download_server_btn.grid(row=0, column=0, sticky="ew", padx=(0,5))
+
+        self.download_client_btn = ttk.Button(
+            btn_frame, text="Download Client Jar", command=self.download_client, state=tk.DISABLED)
+        self.download_client_btn.grid(row=0, column=1, sticky="ew", padx=5)
+
+        self.tech_btn = ttk.Button(
+            btn_frame, text="Show Technical Details", command=self.show_technical, state=tk.DISABLED)
+        self.tech_btn.grid(row=0, column=2, sticky="ew", padx=5)
+
+        self.diagnostics_btn = ttk.Button(btn_frame, text="Diagnostics", command=self.show_diagnostics)
+        self.diagnostics_btn.grid(row=0, column=3, sticky="ew", padx=5)
+        self.diagnostics_window = None
+        self.technical_window = None
+
+        self.install_btn = ttk.Button(
+            btn_frame, text="Install Full Client", command=self.install_client, state=tk.DISABLED)
+        self.install_btn.grid(row=0, column=4, sticky="ew", padx=(5,0))
+
+        self.all_versions = [] # Store the complete list of versions
+        self.current_display_versions = [] # Store the currently filtered/displayed versions
+        self.catalog = build_catalog({}) # Indexed records, with fallback server/custom client URLs resolved
+        self.search_index = VersionSearchIndex([])
+        self.jar_checksums = {} # url -> (sha1, size) for the selected version's Mojang jars
+        self.install_target = None # (version entry, version JSON) when a full client install is possible
+        self._pending_search = None # after() id of a debounced search
+        self._last_search = ""
+        self.manifest_loader = ManifestLoader()
+        self.version_cache = VersionJsonCache()
+        self.version_prefetcher = VersionPrefetcher(self.version_cache)
+        self.detail_loader = DetailLoader(self.version_cache)
+        self.cancel = threading.Event() # Set when the window closes; running downloads stop at their next block
+        self.downloader = SegmentedDownloader(cancel=self.cancel)
+        self.jar_store = JarStore(self.downloader)
+        self.ui = UiEventQueue(self) # Worker threads only touch Tk through this
+        self.snapshot = CatalogSnapshot()
+
+        # The snapshot from the last run fills the list before the window first draws;
+        # its search index is built on the loader thread, which then revalidates as usual.
+        snapshot = self.snapshot.load(self.manifest_loader.signature(STARTUP_MANIFEST_URLS))
+        if snapshot is not None:
+            self._show_catalog(snapshot, self.search_index)
+
+        self.load_progress.start(10)
+        threading.Thread(target=self.load_versions, args=(snapshot,), daemon=True).start()
+
+    def load_versions(self, snapshot=None):
+        try:
+            # Show the catalog from the last run straight away (this also covers offline use),
+            # then revalidate all three manifests in parallel and only rebuild if something changed.
+            if snapshot is not None:
+                showing_cached = True
+                search_index = VersionSearchIndex(snapshot.versions, snapshot.server_fallback_ids())
+                self.ui.post(self._set_search_index, snapshot, search_index)
+            else:
+                signature = self.manifest_loader.signature(STARTUP_MANIFEST_URLS)
+                cached = {url: self.manifest_loader.load_cached(url) for url in STARTUP_MANIFEST_URLS}
+                showing_cached = all(doc is not None for doc in cached.values())
+                if showing_cached:
+                    self._apply_manifests(cached, signature)
+
+            results = self.manifest_loader.fetch_all(STARTUP_MANIFEST_URLS)
+            if showing_cached and not any(r.status == "fresh" for r in results.values()):
+                return
+
+            mojang = results[MANIFEST_URL]
+            if mojang.error:
+                self.ui.post(messagebox.showwarning, "Warning", f"Could not load official Mojang manifest:\n{mojang.error}. Only custom versions may be available.")
+            missing_servers = results[MISSING_SERVERS_URL]
+            if missing_servers.error:
+                print(f"Warning: Failed to load fallback server list: {missing_servers.error}")
+                self.ui.post(messagebox.showwarning, "Warning", f"Could not load fallback server list:\n{missing_servers.error}")
+            missing_clients = results[MISSING_CLIENTS_URL]
+            if missing_clients.error:
+                print(f"Warning: Failed to load custom client list: {missing_clients.error}")
+                self.ui.post(messagebox.showwarning, "Warning", f"Could not load custom client list:\n{missing_clients.error}")
+
+            complete = not any(r.status == "failed" for r in results.values())
+            signature = self.manifest_loader.signature(STARTUP_MANIFEST_URLS) if complete else None
+            self._apply_manifests({url: r.data for url, r in results.items()}, signature)
+        except Exception as e:
+            self.ui.post(messagebox.showerror, "Error", f"An unexpected error occurred during loading:\n{e}")
+        finally:
+            self.ui.post(self._finish_loading)
+
+    def _finish_loading(self):
+        self.load_progress.stop()
+        self.load_progress.grid_remove()
+        self.watch_check.config(state=tk.NORMAL)
+
+    def destroy(self):
+        # Worker pool threads are joined at exit, so they have to stop before the process can
+        self.cancel.set()
+        self.detail_loader.close()
+        self.version_prefetcher.close()
+        FETCHER.close()
+        super().destroy()
+
+    def toggle_watch(self):
+        """Starts or stops polling the manifests every WATCH_INTERVAL seconds."""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+        if not self.watch_enabled.get():
+            self.watch_status.config(text="")
+            return
+        stop = threading.Event()
+        self._watch_stop = stop
+        watcher = ManifestWatcher(self.catalog, self.manifest_loader, self.snapshot)
+        threading.Thread(target=watcher.run, daemon=True,
+                         args=(lambda catalog, delta: self._on_watch_change(catalog, delta, stop), stop,
+                               WATCH_INTERVAL)).start()
+
+    def _on_watch_change(self, catalog, delta, stop):
+        """Runs on the watch thread when the manifests changed."""
+        if stop.is_set():
+            return
+        search_index = VersionSearchIndex(catalog.versions, catalog.server_fallback_ids())
+        self.ui.post(self._apply_watch_change, catalog, search_index, delta, stop)
+        # Unchanged versions keep their cached JSON; only new and changed ones are fetched
+        self.version_prefetcher.prefetch([catalog.get(version_id) for version_id in delta.added + delta.changed])
+
+    def _apply_watch_change(self, catalog, search_index, delta, stop):
+        if stop.is_set():
+            return
+        self.catalog = catalog
+        self.all_versions = catalog.versions
+        self.search_index = search_index
+        rows = search_index.search(self._last_search) if self._last_search else catalog.versions
+        self.current_display_versions = rows
+        with METRICS.span("ui.list_rebuild"):
+            self.vers_list.update_rows(rows, key=lambda v: v["id"])
+        self.watch_status.config(
+            text=f"{len(delta.added)} new, {len(delta.changed)} changed, {len(delta.removed)} removed")
+
+        idx = self.vers_list.selected_index()
+        if idx is not None and rows[idx]["id"] in delta.changed:
+            self.on_select(None) # Its details are out of date
+
+    def _apply_manifests(self, docs, signature=None):
+        """
+        Rebuilds the catalog from the three startup manifests (a missing document counts as empty)
+        and, given the signature of the cached manifests it came from, saves it as the snapshot.
+        Runs on the loader thread; the result is handed to the main thread to display.
+        """
+        catalog = build_catalog(docs)
+        if signature:
+            self.snapshot.save(catalog, signature)
+        search_index = VersionSearchIndex(catalog.versions, catalog.server_fallback_ids())
+        self.ui.post(self._show_catalog, catalog, search_index)
+
+    def _show_catalog(self, catalog, search_index):
+        self.catalog = catalog
+        self.all_versions = catalog.versions
+        self.search_index = search_index
+        self._last_search = ""
+
+        if self.search_entry.get().strip():
+            self.search_versions() # Keep the list in line with the query still in the box
+        else:
+            self.update_version_list(self.all_versions)
+
+    def _set_search_index(self, catalog, search_index):
+        if catalog is self.catalog:
+            self.search_index = search_index
+            self._last_search = ""
+            if self.search_entry.get().strip():
+                self.search_versions() # Typed before the index was ready
+
+    def update_version_list(self, versions_to_display):
+        """Shows the given list of versions; only the rows in view are redrawn."""
+        self.current_display_versions = versions_to_display
+        with METRICS.span("ui.list_rebuild"):
+            self.vers_list.set_rows(self.current_display_versions)
+
+    def _version_row_values(self, v):
+        # Ensure custom client versions have 'type' and 'releaseTime' for display
+        display_type = v.get("type", "Custom Client") # Default type for custom
+        display_time = v.get("releaseTime", "N/A")    # Default time for custom
+        return (v["id"], display_type, display_time)
+
+    def perform_search_event(self, event):
+        """Called when Enter key is pressed in the search entry."""
+        self.search_versions()
+
+    def schedule_search(self, event):
+        """Search-as-you-type: runs the search once typing pauses for SEARCH_DEBOUNCE_MS."""
+        if not self.search_as_you_type.get():
+            return
+        if self._pending_search is not None:
+            self.after_cancel(self._pending_search)
+        self._pending_search = self.after(SEARCH_DEBOUNCE_MS, self.search_versions)
+
+    def search_versions(self):
+        self._pending_search = None
+        query = self.search_entry.get().strip()
+        if query == self._last_search:
+            return # e.g. arrow keys or Shift in the entry, nothing to do
+        self._last_search = query
+        if not query:
+            self.update_version_list(self.all_versions) # Show all if search is empty
+            return
+
+        self.update_version_list(self.search_index.search(query))
+        self.show_details("") # Clear details when search changes
+        # Disable buttons until a new selection is made
+        self.download_server_btn.config(state=tk.DISABLED)
+        self.download_client_btn.config(state=tk.DISABLED)
+        self.tech_btn.config(state=tk.DISABLED)
+        self.install_btn.config(state=tk.DISABLED)
+
+
+    def on_select(self, ev):
+        idx = self.vers_list.selected_index()
+        if idx is None:
+            # Clear details and disable buttons if nothing is selected (e.g., after a search)
+            self.show_details("")
+            self.download_server_btn.config(state=tk.DISABLED)
+            self.download_client_btn.config(state=tk.DISABLED)
+            self.tech_btn.config(state=tk.DISABLED)
+            self.install_btn.config(state=tk.DISABLED)
+            return
+
+        # Ensure we access the correct version from the currently displayed list
+        if idx >= len(self.current_display_versions):
+            return # Index out of bounds if selection was made on old list
+        v = self.current_display_versions[idx]
+
+        # Reset state and show loading message immediately
+        self.show_details(f"Loading details for {v['id']}...")
+        self.download_server_btn.config(state=tk.DISABLED)
+        self.download_client_btn.config(state=tk.DISABLED)
+        self.tech_btn.config(state=tk.DISABLED)
+        self.install_btn.config(state=tk.DISABLED)
+
+        # Load the details in the background; results for superseded selections are dropped
+        self.detail_loader.request(v, self._on_details_loaded)
+
+        # Warm the cache for the neighbours, nearest first, so browsing with the arrow keys stays local
+        neighbours = []
+        for offset in range(1, PREFETCH_RADIUS + 1):
+            for n in (idx + offset, idx - offset):
+                if 0 <= n < len(self.current_display_versions):
+                    neighbours.append(self.current_display_versions[n])
+        self.version_prefetcher.prefetch(neighbours)
+
+    def _on_details_loaded(self, v, vjson, error, generation):
+        """
+        Called by the DetailLoader, usually on one of its worker threads, with the version JSON
+        (empty for versions without a Mojang URL) or the error that prevented loading it.
+        """
+        vjson = vjson or {} # Details from Mojang's full version JSON
+        client_url = None
+        server_url = None
+        tech_info = []
+        mojang_details_loaded = False
+        message_prefix = "" # To prepend to details text if there's a warning
+
+        # Try to load full Mojang details if this version has a 'url' field (which Mojang versions do)
+        if 'url' in v:
+            if error is None:
+                downloads = vjson.get('downloads', {})
+                client_url = downloads.get('client', {}).get('url')
+                server_url = downloads.get('server', {}).get('url')
+                if server_url:
+                    self.ui.post(self.search_index.mark_has_server, v["id"])
+                else:
+                    self.ui.post(self.search_index.mark_no_server, v["id"])
+                mojang_details_loaded = True
+            else:
+                # Only show a warning if Mojang details failed to load AND it was expected to have them
+                message_prefix = f"Warning: Could not load full Mojang details for {v['id']}:\n{error}\nChecking fallback lists...\n\n"
+        # else: Removed: "Displaying custom client details for [VERSION]"
+            # This is likely a custom client version without a Mojang URL, no special prefix needed now.
+
+
+        # --- EXISTING FALLBACK LOGIC for Server URL (resolved when the catalog was built) ---
+        if not server_url and v.server_url:
+            server_url = v.server_url
+
+        # --- Use the custom client list's client_url if available and not already set by Mojang ---
+        if v.client_url and not client_url:
+            client_url = v.client_url
+
+        lines = [
+            f"ID: {v.get('id', 'N/A')}",
+            f"Type: {v.get('type', 'Unknown Type')}", # Default type changed
+            f"Release Time: {v.get('releaseTime', 'N/A')}" # Default time for custom clients
+        ]
+
+        # Add details from Mojang's vjson if it was successfully loaded
+        if mojang_details_loaded:
+            if 'mainClass' in vjson:
+                lines.append(f"Main Class: {vjson['mainClass']}")
+            if 'complianceLevel' in vjson:
+                lines.append(f"Compliance Level: {vjson['complianceLevel']}")
+
+        # Report client jar info if available
+        if client_url:
+            # Determine source of client URL
+            client_source = "Mojang Servers"
+            if v.client_url and client_url == v.client_url:
+                client_source = "Not from Mojang's Servers" # Changed from "Custom Client List"
+            elif not mojang_details_loaded: # If Mojang details weren't loaded but a URL was found (e.g., from fallback not handled above)
+                client_source = "Unknown Source (Not Mojang)"
+
+
+            # If client URL came from Mojang's downloads, get its size
+            if mojang_details_loaded and client_url == vjson.get('downloads', {}).get('client', {}).get('url'):
+                 client_size = vjson.get('downloads', {}).get('client', {}).get('size', 'n/a')
+                 lines.append(f"Client Jar Size: {client_size} bytes (Source: {client_source})")
+            else:
+                 lines.append(f"Client Jar: Available (Source: {client_source})")
+
+        # Report server jar info if available (can be from Mojang or fallback)
+        if server_url:
+            server_source = "Mojang Servers"
+            if v.server_url and server_url == v.server_url:
+                server_source = "Not from Mojang's Servers (Fallback)" # Changed similar to client
+            elif not mojang_details_loaded:
+                server_source = "Unknown Source (Not Mojang)"
+
+
+            if mojang_details_loaded and server_url == vjson.get('downloads', {}).get('server', {}).get('url'):
+                 server_size = vjson.get('downloads', {}).get('server', {}).get('size', 'n/a')
+                 lines.append(f"Server Jar Size: {server_size} bytes (Source: {server_source})")
+            else:
+                 lines.append(f"Server Jar: Available (Source: {server_source})")
+
+
+        # prepare technical info ONLY from Mojang's vjson, as fallback only provides URL
+        if mojang_details_loaded:
+            ai = vjson.get('assetIndex', {})
+            if ai:
+                tech_info.append(f"AssetIndex URL: {ai.get('url')}")
+                tech_info.append(f"AssetIndex SHA1: {ai.get('sha1')}")
+            for part in ('client','server'):
+                info = vjson.get('downloads', {}).get(part, {})
+                if info and info.get('url'): # Check if URL exists in Mojang data
+                    tech_info.append(f"{part.capitalize()} URL: {info.get('url')}")
+                    tech_info.append(f"{part.capitalize()} SHA1: {info.get('sha1')}")
+            tech_info.append(f"Libraries Count: {len(vjson.get('libraries', []))}")
+
+        # Add custom client's URL to tech info if it exists
+        if v.client_url:
+             tech_info.append(f"Client URL (Not from Mojang): {v.client_url}") # Renamed for tech info
+
+        # SHA1 and size of the jars that come from Mojang, used to verify and dedupe downloads
+        jar_checksums = {}
+        if mojang_details_loaded:
+            for info in vjson.get('downloads', {}).values():
+                if info.get('url') in (client_url, server_url) and info.get('sha1'):
+                    jar_checksums[info['url']] = (info['sha1'], info.get('size'))
+
+        # A full install needs Mojang's version JSON (libraries, asset index and client jar)
+        install_target = (v, vjson) if mojang_details_loaded and vjson.get('downloads', {}).get('client') else None
+
+        # Schedule the UI update on the main thread
+        self.ui.post(self._update_ui_after_details_load,
+                   message_prefix + "\n".join(lines), client_url, server_url, tech_info, jar_checksums,
+                   install_target, generation)
+
+    def _update_ui_after_details_load(self, details_text, client_url, server_url, tech_info, jar_checksums,
+                                      install_target, generation):
+        """
+        Updates the UI elements on the main thread after version details have been loaded.
+        """
+        if generation != self.detail_loader.generation:
+            return # The selection changed while these details were on their way
+        self.show_details(details_text)
+
+        # Update instance variables
+        self.client_url = client_url
+        self.server_url = server_url
+        self.tech_info = tech_info
+        self.jar_checksums = jar_checksums
+        self.install_target = install_target
+
+        # Re-enable/disable buttons based on the newly loaded URLs and tech info
+        self.download_server_btn.config(state=tk.NORMAL if self.server_url else tk.DISABLED)
+        self.download_client_btn.config(state=tk.NORMAL if self.client_url else tk.DISABLED)
+        self.tech_btn.config(state=tk.NORMAL if self.tech_info else tk.DISABLED)
+        self.install_btn.config(state=tk.NORMAL if self.install_target else tk.DISABLED)
+
+    def show_details(self, text):
+        self.details.configure(state=tk.NORMAL)
+        self.details.delete("1.0", tk.END)
+        self.details.insert(tk.END, text)
+        self.details.configure(state=tk.DISABLED)
+
+    def show_technical(self):
+        jars = {}
+        for kind, url in (("server", self.server_url), ("client", self.client_url)):
+            if url:
+                sha1, size = self.jar_checksums.get(url, (None, None))
+                jars[kind] = {"url": url, "sha1": sha1, "size": size}
+        if self.technical_window is not None and self.technical_window.winfo_exists():
+            self.technical_window.destroy()
+        self.technical_window = TechnicalDetailsWindow(self, self.tech_info, jars, self.jar_store, self.ui)
+
+    def show_diagnostics(self):
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+            return
+        self.diagnostics_window = DiagnosticsWindow(self)
+
+    def download_server(self):
+        self._download(self.server_url)
+
+    def download_client(self):
+        self._download(self.client_url)
+
+    def _download(self, url):
+        from tkinter import filedialog
+        default_name = os.path.basename(url)
+        path = filedialog.asksaveasfilename(
+            defaultextension=".jar",
+            initialfile=default_name,
+            filetypes=[("Java Archive", "*.jar"), ("All files","*.*")]
+        )
+        if not path:
+            return
+        # show determinate progress bar
+        self.download_progress.grid()
+        self.download_progress['value'] = 0
+        # Disable all action buttons during download
+        self.download_server_btn.config(state=tk.DISABLED)
+        self.download_client_btn.config(state=tk.DISABLED)
+        self.tech_btn.config(state=tk.DISABLED)
+        self.install_btn.config(state=tk.DISABLED)
+        self.search_button.config(state=tk.DISABLED)
+        self.search_entry.config(state=tk.DISABLED)
+        sha1, size = self.jar_checksums.get(url, (None, None))
+        threading.Thread(target=self._download_thread, args=(url, path, sha1, size), daemon=True).start()
+
+    def _report_progress(self, done, total_size):
+        # Called from download threads for every block; only the latest value is drawn
+        if total_size:
+            self.ui.post_latest("download_progress", self._show_progress, done * 100 / total_size)
+
+    def _show_progress(self, percent):
+        self.download_progress['value'] = min(percent, 100)
+
+    def _download_thread(self, url, path, sha1=None, size=None):
+        try:
+            if sha1:
+                # Verified against Mojang's SHA1 and kept in the shared jar store
+                if self.jar_store.fetch(url, path, sha1, size, progress=self._report_progress):
+                    self.ui.post(messagebox.showinfo, "Downloaded", f"Saved to: {path}\n(already downloaded, taken from the local jar store)")
+                else:
+                    self.ui.post(messagebox.showinfo, "Downloaded", f"Saved to: {path}\nSHA1 verified.")
+            else:
+                self.downloader.download(url, path, progress=self._report_progress)
+                self.ui.post(messagebox.showinfo, "Downloaded", f"Saved to: {path}")
+        except Exception as e:
+            self.ui.post(messagebox.showerror, "Error", f"Download failed:\n{e}")
+        finally:
+            self.ui.post(self._restore_after_download)
+
+    def _restore_after_download(self):
+        # hide download progress and restore buttons based on current selection
+        self.download_progress.grid_remove()
+        # Re-enable buttons based on current selection if any
+        idx = self.vers_list.selected_index()
+        if idx is not None:
+            if idx < len(self.current_display_versions): # Check bounds
+                # Re-trigger on_select to re-evaluate button states
+                # This is cleaner than re-implementing the logic here
+                self.on_select(None) # Pass None as event as we are not reacting to a real event
+        else:
+            self.download_server_btn.config(state=tk.DISABLED)
+            self.download_client_btn.config(state=tk.DISABLED)
+            self.tech_btn.config(state=tk.DISABLED)
+            self.install_btn.config(state=tk.DISABLED)
+
+        self.search_button.config(state=tk.NORMAL)
+        self.search_entry.config(state=tk.NORMAL)
+
+    def install_client(self):
+        from tkinter import filedialog
+        v, vjson = self.install_target
+        directory = filedialog.askdirectory(title=f"Install Minecraft {v['id']} into")
+        if not directory:
+            return
+        self.download_progress.grid()
+        self.download_progress['value'] = 0
+        self.download_server_btn.config(state=tk.DISABLED)
+        self.download_client_btn.config(state=tk.DISABLED)
+        self.tech_btn.config(state=tk.DISABLED)
+        self.install_btn.config(state=tk.DISABLED)
+        self.search_button.config(state=tk.DISABLED)
+        self.search_entry.config(state=tk.DISABLED)
+        threading.Thread(target=self._install_thread, args=(v, vjson, directory), daemon=True).start()
+
+    def _report_install_progress(self, stats):
+        if stats["total"]:
+            self.ui.post_latest("download_progress", self._show_progress,
+                                (stats["done"] + stats["failed"]) * 100 / stats["total"])
+
+    def _install_thread(self, v, vjson, directory):
+        try:
+            installer = ClientInstaller(directory, self.jar_store, cancel=self.cancel)
+            stats = installer.install(v, vjson, progress=self._report_install_progress)
+            summary = (f"Installed {v['id']} into: {directory}\n\n"
+                       f"{stats['done']} files ({stats['skipped']} already present, {stats['failed']} failed)\n"
+                       f"{stats['files_per_sec']} files/sec, {stats['mb_per_sec']} MB/sec")
+            if stats["failed"]:
+                self.ui.post(messagebox.showwarning, "Installed with errors", summary)
+            else:
+                self.ui.post(messagebox.showinfo, "Installed", summary)
+        except Exception as e:
+            self.ui.post(messagebox.showerror, "Error", f"Install failed:\n{e}")
+        finally:
+            self.ui.post(self._restore_after_download)